@@ -2,192 +2,71 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import Calendar
 import pandas as pd
-import numpy as np
-from datetime import datetime
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
-import json
 import subprocess
 import webbrowser
+from risk_calculations import RISK_ENGINES, get_engine
+from sample_pool import get_process_pool
+from threshold_store import ThresholdStore
+from history_view import HistoryView
+from trade_journal import JOURNAL_FILE, TRADE_COLUMNS, TradeJournal
+from trade_buffer import TradeBuffer
 
 
 
 # Set up colors for a modern, enterprise-style GUI
 PRIMARY_COLOR = "#1E3A8A"  # Enterprise blue
 SECONDARY_COLOR = "#003366"  # Dark blue
-DATA_FILE = "trade_data.json"
+DATA_FILE = "trade_data.json"  # Pre-journal storage, imported into the journal on first start
+DEFAULT_ENGINE = "numpy"
+THRESHOLD_POLL_MS = 2000  # How often risk_thresholds.json is checked for a finished training run
 
  
 
     
-def monte_carlo_risk_simulation(trade_size, trade_value, num_simulations=10000):
-    if trade_value <= 0 or trade_size <= 0:
-        return 0
-
-    # Adjusted ranges for simulation
-    mean_return = np.random.uniform(-0.05, 0.05)  # Between -5% and +5%
-    volatility = np.random.uniform(0.05, 0.25)   # Between 5% and 25%
-
-    # Generate random simulations
-    simulations = np.random.normal(
-        loc=trade_value * mean_return,
-        scale=trade_value * volatility,
-        size=num_simulations
-    )
-
-    # Extract losses
-    losses = simulations[simulations < 0]
-    if len(losses) == 0:
-        return 0.01
-
-    # Calculate the 95th percentile of losses
-    percentile_loss = -np.percentile(losses, 95)
-
-    # Normalize risk factor
-    normalized_risk = percentile_loss / (trade_value * volatility)
-    final_risk_factor = min(max(normalized_risk, 0.01), 1)  # Clamp between 0.01 and 1
-
-    return final_risk_factor
-
-
-
-
-    
-    
-    
-    
-def value_at_risk(trade_value, confidence_level=0.95, num_simulations=10000):
-    if trade_value <= 0:
-        return 0
-    # Simulate losses
-    losses = np.random.normal(
-        loc=trade_value * 0.01,
-        scale=trade_value * np.random.uniform(0.03, 0.07),
-        size=num_simulations
-    )
-    # Use a less aggressive threshold for losses
-    var_threshold = np.percentile(losses, (1 - confidence_level) * 100)
-    # Normalize by trade value
-    var = abs(var_threshold) / trade_value
-    return min(max(var, 0), 1)  # Clamp to [0, 1]
-
-
-
-def conditional_value_at_risk(trade_value, confidence_level=0.95, num_simulations=10000):
-    if trade_value <= 0:
-        return 0
-    losses = np.random.normal(
-        loc=trade_value * 0.01,
-        scale=trade_value * np.random.uniform(0.03, 0.07),
-        size=num_simulations
-    )
-    losses_sorted = np.sort(losses)
-    var_index = int((1 - confidence_level) * len(losses_sorted))
-    cvar = np.mean(losses_sorted[:var_index]) if var_index > 0 else 0
-    # Normalize CVaR
-    normalized_cvar = abs(cvar) / trade_value
-    return min(max(normalized_cvar, 0), 1)  # Clamp to [0, 1]
-
-
-
-
-def risk_parity(trade_value):
-    if trade_value <= 0:
-        return 0
-    # Adjust risk parity based on a more dynamic model or market conditions
-    risk_parity_value = trade_value * np.random.uniform(0.05, 0.15) / (trade_value + 10)
-    return min(max(risk_parity_value, 0), 1)  # Clamp to [0, 1]
-
-
-    
-
 # Data Handling
-def save_data(trades):
+def open_journal():
+    """
+    Open the trade journal, migrating trade_data.json into it the first time.
+    """
+    journal = TradeJournal(JOURNAL_FILE)
     try:
-        trades.to_json(DATA_FILE, orient="records", date_format="iso")
+        imported = journal.import_json(DATA_FILE)
+        if imported:
+            print(f"Imported {imported} trades from {DATA_FILE} into {JOURNAL_FILE}")
     except Exception as e:
-        print(f"Error saving data: {e}")
+        print(f"Error importing {DATA_FILE}: {e}")
+    return journal
 
-def load_data():
-    if os.path.exists(DATA_FILE):
-        try:
-            trades = pd.read_json(DATA_FILE)
-            # Ensure all required columns are present
-            required_columns = ["Date", "Ticker", "Trade Size", "Trade Value", "Monte Carlo Risk", "VaR", "CVaR", "Risk Parity", "Final Risk Factor"]
-            for col in required_columns:
-                if col not in trades.columns:
-                    trades[col] = np.nan
-            return trades
-        except Exception as e:
-            print(f"Error loading data: {e}")
+def load_data(journal):
+    try:
+        return journal.load()
+    except Exception as e:
+        print(f"Error loading data: {e}")
     # Return empty DataFrame with required columns
-    return pd.DataFrame(columns=["Date", "Ticker", "Trade Size", "Trade Value", "Monte Carlo Risk", "VaR", "CVaR", "Risk Parity", "Final Risk Factor"])
+    return pd.DataFrame(columns=TRADE_COLUMNS)
 
 
 class TradeTrackerApp:
 
  
-    def format_risk_level(self, risk):
+    def watch_thresholds(self):
         """
-        Determine the risk level based on thresholds. Use default values if the file is not found.
+        Pick up thresholds written by a training run without restarting the app.
         """
-        default_thresholds = {"Low": 0.08, "Medium": 0.12, "High": float("inf")}  # Default thresholds
-    
-        try:
-            with open("risk_thresholds.json", "r") as file:
-                thresholds = json.load(file)
-        except FileNotFoundError:
-            thresholds = default_thresholds  # Fallback to defaults if file not found
-    
-        if risk < thresholds['Low']:
-            return "Low", "green"
-        elif risk < thresholds['Medium']:
-            return "Medium", "orange"
-        else:
-            return "High", "red"
+        if self.threshold_store.refresh():
+            self.refresh_risk_levels()
+            self.update_help_text()
+        self.root.after(THRESHOLD_POLL_MS, self.watch_thresholds)
 
     def refresh_risk_levels(self):
         """
-        Refresh risk levels for all entries in the history tree based on the latest thresholds.
-        """
-        for item in self.history_tree.get_children():
-            values = self.history_tree.item(item, "values")
-            final_risk = float(values[8])  # Assuming final risk is in the 9th column
-            risk_label, color = self.format_risk_level(final_risk)
-            self.history_tree.item(item, values=values[:-1] + (risk_label,))
-            self.history_tree.tag_configure(risk_label, background=color, foreground="white")
-
-    def add_trade_to_history(self, date, ticker, size, value, monte_carlo, var, cvar, risk_parity, final_risk):
-        """
-        Add a trade to the history tree with a dynamically determined risk level.
+        Refresh risk levels of the whole history based on the latest thresholds.
         """
-        # Ensure the date is in the desired format
-        if isinstance(date, pd.Timestamp):  # Check if it's a Timestamp
-            formatted_date = date.strftime('%Y-%m-%d')
-        elif isinstance(date, str):  # If it's already a string
-            formatted_date = datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m-%d')
-        else:
-            formatted_date = str(date)  # Fallback to string representation
-    
-        risk_label, color = self.format_risk_level(final_risk)
-        new_item = self.history_tree.insert(
-            "",
-            "end",
-            values=(
-                formatted_date, ticker, size, value, f"{monte_carlo:.2f}",
-                f"{var:.2f}", f"{cvar:.2f}", f"{risk_parity:.2f}", f"{final_risk:.2f}", risk_label
-            ),
-            tags=(risk_label,)
-        )
-        self.history_tree.tag_configure("Low", background="green", foreground="white")
-        self.history_tree.tag_configure("Medium", background="orange", foreground="white")
-        self.history_tree.tag_configure("High", background="red", foreground="white")
-        self.history_tree.see(new_item)  # Automatically scroll to the last entry
+        self.history.refresh_levels()
 
- 
- 
-    
     def generate_report(self):
         # Create an HTML report
         report_path = os.path.join(os.getcwd(), "risk_report.html")
@@ -199,8 +78,9 @@ class TradeTrackerApp:
                 report_file.write("<tr><th>Date</th><th>Ticker</th><th>Size</th><th>Value</th>"
                                   "<th>Monte Carlo</th><th>VaR</th><th>CVaR</th><th>Risk Parity</th><th>Final Risk</th></tr>")
                 
-                for _, row in self.trades.iterrows():   
-                        risk_level, _ = self.format_risk_level(row['Final Risk Factor'])
+                trades = self.trades.frame()
+                risk_levels = self.threshold_store.levels(trades['Final Risk Factor'])
+                for (_, row), risk_level in zip(trades.iterrows(), risk_levels):
                         report_file.write(f"<tr><td>{row['Date']}</td><td>{row['Ticker']}</td><td>{row['Trade Size']}</td>"
                                         f"<td>{row['Trade Value']}</td><td>{row['Monte Carlo Risk']:.2f}</td>"
                                         f"<td>{row['VaR']:.2f}</td><td>{row['CVaR']:.2f}</td>"
@@ -273,12 +153,19 @@ class TradeTrackerApp:
         self.root.geometry(f"{app_width}x{app_height}+{x_offset}+{y_offset}")
         self.root.state("zoomed")
 
-        # Load trade data
-        self.trades = load_data()
+        # Risk engines are created on first use and kept so their timing counters survive switching
+        self.engines = {}
+        self.engine = self.get_risk_engine(DEFAULT_ENGINE)
+
+        # Load trade data; every submitted trade is written to the journal right away
+        self.journal = open_journal()
+        # Columnar buffer so submitting a trade does not copy the whole history
+        self.trades = TradeBuffer.from_frame(load_data(self.journal))
         self.highest_trade = {"size": 0, "value": 0}
 
         if not self.trades.empty:
-            highest_trade_row = self.trades.iloc[self.trades["Trade Value"].idxmax()]
+            trades = self.trades.frame()
+            highest_trade_row = trades.iloc[trades["Trade Value"].idxmax()]
             self.highest_trade = {
                 "size": highest_trade_row["Trade Size"],
                 "value": highest_trade_row["Trade Value"],
@@ -288,18 +175,38 @@ class TradeTrackerApp:
                 "risk_parity": highest_trade_row["Risk Parity"]
             }
 
+        # Thresholds are read once and reloaded only when a training run rewrites the file
+        self.threshold_store = ThresholdStore()
+
         # Create GUI
         self.create_widgets()
 
         # Update visualization on startup
         self.update_visualization()
         self.refresh_risk_levels()
-
+        self.root.after(THRESHOLD_POLL_MS, self.watch_thresholds)
 
         # Bind window close event to save data
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         
+    def get_risk_engine(self, name):
+        if name not in self.engines:
+            self.engines[name] = get_engine(name)
+        return self.engines[name]
+
+    def set_risk_engine(self, name):
+        """
+        Switch the risk engine used by the sliders and trade submission.
+        """
+        self.engine = self.get_risk_engine(name)
+        self.update_calculations()
+
+    def update_engine_stats(self):
+        stats = self.engine.stats()
+        average_ms = 1000 * stats["seconds"] / stats["calls"] if stats["calls"] else 0.0
+        self.engine_stats_label.config(text=f"{stats['calls']} evaluations, {average_ms:.1f} ms avg")
+
     def adjust_slider(self, slider, delta):
         """
         Adjust the slider value by a specified delta.
@@ -411,42 +318,18 @@ class TradeTrackerApp:
             # Add "Training Mode" button
         training_button = ttk.Button(form_frame, text="Training Mode", command=self.launch_training_mode)
         training_button.grid(row=6, column=0, columnspan=2, pady=10)
-    
-        # History tree in the right frame
-        self.tree_scrollbar = ttk.Scrollbar(history_frame)
-        self.tree_scrollbar.pack(side="right", fill="y")
-    
-        self.tree_hscrollbar = ttk.Scrollbar(history_frame, orient="horizontal")
-        self.tree_hscrollbar.pack(side="bottom", fill="x")
-    
-        self.history_tree = ttk.Treeview(
-            history_frame,
-            columns=("Date", "Ticker", "Size", "Value", "Monte Carlo", "VaR", "CVaR", "Risk Parity", "Final Risk", "Risk Level"),
-            show="headings",
-            yscrollcommand=self.tree_scrollbar.set,
-            xscrollcommand=self.tree_hscrollbar.set
-        )
-        self.tree_scrollbar.config(command=self.history_tree.yview)
-        self.tree_hscrollbar.config(command=self.history_tree.xview)
-    
-        # Update column widths
-        column_widths = {
-            "Date": 150,
-            "Ticker": 100,
-            "Size": 100,
-            "Value": 150,
-            "Monte Carlo": 150,
-            "VaR": 150,
-            "CVaR": 150,
-            "Risk Parity": 150,
-            "Final Risk": 150,
-            "Risk Level": 100
-        }
-        for col, width in column_widths.items():
-            self.history_tree.heading(col, text=col)
-            self.history_tree.column(col, width=width, anchor="center")
-    
-        self.history_tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        ttk.Label(form_frame, text="Risk Engine:", background=PRIMARY_COLOR, foreground="white").grid(row=7, column=0, padx=10, pady=5, sticky="w")
+        self.engine_selector = ttk.Combobox(form_frame, values=sorted(RISK_ENGINES), state="readonly")
+        self.engine_selector.set(self.engine.name)
+        self.engine_selector.bind("<<ComboboxSelected>>", lambda e: self.set_risk_engine(self.engine_selector.get()))
+        self.engine_selector.grid(row=7, column=1, padx=10, pady=5, sticky="ew")
+        self.engine_stats_label = tk.Label(form_frame, text="", background=PRIMARY_COLOR, foreground="white")
+        self.engine_stats_label.grid(row=7, column=2, columnspan=3, padx=10, pady=5, sticky="w")
+    
+        # History view in the right frame; it only materializes the rows on screen
+        self.history = HistoryView(history_frame, self.threshold_store, self.journal.positions,
+                                   background=PRIMARY_COLOR)
         self.load_history()
     
     def launch_training_mode(self):
@@ -477,23 +360,40 @@ class TradeTrackerApp:
         """
         Create the Help tab and display thresholds dynamically. Use defaults if the file is missing.
         """
-        default_thresholds = {"Low": 0.08, "Medium": 0.12, "High": float("inf")}  # Default thresholds
-    
-        try:
-            with open("risk_thresholds.json", "r") as file:
-                risk_thresholds = json.load(file)
-        except FileNotFoundError:
-            risk_thresholds = default_thresholds  # Fallback to defaults if file not found
-    
-        low_threshold = risk_thresholds['Low']
-        medium_threshold = risk_thresholds['Medium']
-        high_threshold = risk_thresholds['High']
-    
         header = tk.Frame(frame, bg=SECONDARY_COLOR, height=50)
         header.pack(fill="x")
         title = tk.Label(header, text="Help & Documentation", bg=SECONDARY_COLOR, fg="white", font=("Helvetica", 18, "bold"))
         title.pack(pady=10)
     
+        # Create a frame to hold the scrollbars and text widget
+        text_frame = tk.Frame(frame)
+        text_frame.pack(fill="both", expand=True, padx=10, pady=10)
+    
+        # Create the vertical scrollbar
+        scrollbar_y = tk.Scrollbar(text_frame, orient="vertical")
+    
+        # Create the horizontal scrollbar
+        scrollbar_x = tk.Scrollbar(text_frame, orient="horizontal")
+    
+        # Create the Text widget
+        self.help_text = tk.Text(text_frame, wrap="word", font=("Helvetica", 12), yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        self.update_help_text()
+        self.help_text.pack(side="left", fill="both", expand=True)
+    
+        # Attach the scrollbars to the Text widget
+        scrollbar_y.config(command=self.help_text.yview)
+        scrollbar_y.pack(side="right", fill="y")
+        
+        scrollbar_x.config(command=self.help_text.xview)
+        scrollbar_x.pack(side="bottom", fill="x")
+
+    def update_help_text(self):
+        """
+        Rewrite the Help tab with the current thresholds.
+        """
+        low_threshold = self.threshold_store.thresholds['Low']
+        medium_threshold = self.threshold_store.thresholds['Medium']
+
         # Create the help message with dynamic threshold values
         help_message = f"""
             **Risk Models and Final Risk Factor**
@@ -532,28 +432,10 @@ class TradeTrackerApp:
             
         """
         
-        # Create a frame to hold the scrollbars and text widget
-        text_frame = tk.Frame(frame)
-        text_frame.pack(fill="both", expand=True, padx=10, pady=10)
-    
-        # Create the vertical scrollbar
-        scrollbar_y = tk.Scrollbar(text_frame, orient="vertical")
-    
-        # Create the horizontal scrollbar
-        scrollbar_x = tk.Scrollbar(text_frame, orient="horizontal")
-    
-        # Create the Text widget
-        help_text = tk.Text(text_frame, wrap="word", font=("Helvetica", 12), yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
-        help_text.insert("1.0", help_message)
-        help_text.config(state="disabled")
-        help_text.pack(side="left", fill="both", expand=True)
-    
-        # Attach the scrollbars to the Text widget
-        scrollbar_y.config(command=help_text.yview)
-        scrollbar_y.pack(side="right", fill="y")
-        
-        scrollbar_x.config(command=help_text.xview)
-        scrollbar_x.pack(side="bottom", fill="x")
+        self.help_text.config(state="normal")
+        self.help_text.delete("1.0", "end")
+        self.help_text.insert("1.0", help_message)
+        self.help_text.config(state="disabled")
 
     def update_size_value(self, val):
         self.size_value_label.config(text=f"{int(float(val))}")
@@ -566,33 +448,13 @@ class TradeTrackerApp:
     def update_calculations(self):
             trade_size = float(self.size_slider.get())
             trade_value = float(self.value_slider.get())
-            
-            monte_carlo_risk = monte_carlo_risk_simulation(trade_size, trade_value)
-            var = value_at_risk(trade_value)
-            cvar = conditional_value_at_risk(trade_value)
-            risk_parity_value = risk_parity(trade_value)
-    
-            # Corrected line: Call the method using self
-            final_risk = self.calculate_final_risk(monte_carlo_risk, var, cvar, risk_parity_value)
+
+            risks = self.engine.evaluate_trade(trade_size, trade_value, pool=get_process_pool())
+            final_risk = risks["final_risk"]
+            self.update_engine_stats()
     
             # Update UI or internal state as needed
             # You may want to display final_risk or use it elsewhere
-    
-    def calculate_final_risk(self, monte_carlo_risk, var, cvar, risk_parity_value):
-        # Assign weights to each risk model
-        weights = {
-            "monte_carlo": 0.3,
-            "var": 0.3,
-            "cvar": 0.2,
-            "risk_parity": 0.2
-        }
-        combined_risk = (
-            monte_carlo_risk * weights["monte_carlo"] +
-            var * weights["var"] +
-            cvar * weights["cvar"] +
-            risk_parity_value * weights["risk_parity"]
-        )
-        return min(max(combined_risk, 0), 1)  # Clamp to [0, 1]
 
     def submit_trade(self):
         ticker = self.ticker_entry.get()
@@ -606,10 +468,12 @@ class TradeTrackerApp:
             return
 
         # Fixes for better risk calculation
-        monte_carlo_risk = monte_carlo_risk_simulation(trade_size, trade_value)
-        var = value_at_risk(trade_value)
-        cvar = conditional_value_at_risk(trade_value)
-        risk_parity_value = risk_parity(trade_value)
+        risks = self.engine.evaluate_trade(trade_size, trade_value, pool=get_process_pool())
+        monte_carlo_risk = risks["monte_carlo"]
+        var = risks["var"]
+        cvar = risks["cvar"]
+        risk_parity_value = risks["risk_parity"]
+        self.update_engine_stats()
 
         # Final risk score
         risk_score = max(monte_carlo_risk, var, cvar, risk_parity_value)
@@ -621,18 +485,19 @@ class TradeTrackerApp:
                                   "cvar": cvar, "risk_parity": risk_parity_value}
 
         # Record trade
-        new_trade = pd.DataFrame([[trade_date, ticker, trade_size, trade_value, monte_carlo_risk, var, cvar, risk_parity_value, risk_score]],
-                                 columns=["Date", "Ticker", "Trade Size", "Trade Value", "Monte Carlo Risk", "VaR", "CVaR", "Risk Parity", "Final Risk Factor"])
-
-        if not new_trade.empty and not new_trade.isna().all(axis=None):
-            self.trades = pd.concat([self.trades, new_trade], ignore_index=True)
-            self.add_trade_to_history(trade_date, ticker, trade_size, trade_value, monte_carlo_risk, var, cvar, risk_parity_value, risk_score)
-            self.update_visualization()
+        new_trade = dict(zip(TRADE_COLUMNS, [trade_date, ticker, trade_size, trade_value, monte_carlo_risk, var, cvar,
+                                             risk_parity_value, risk_score]))
+        try:
+            self.journal.append(new_trade)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save trade: {e}")
+            return
+        self.trades.append(new_trade)
+        self.history.set_trades(self.trades.frame(), scroll_to_end=True)  # Show the new trade, as before
+        self.update_visualization()
 
     def load_history(self):
-        for _, trade in self.trades.iterrows():
-            self.add_trade_to_history(trade["Date"], trade["Ticker"], trade["Trade Size"], trade["Trade Value"],
-                                      trade["Monte Carlo Risk"], trade["VaR"], trade["CVaR"], trade["Risk Parity"], trade["Final Risk Factor"])
+        self.history.set_trades(self.trades.frame(), scroll_to_end=True)
 
  
         
@@ -642,8 +507,9 @@ class TradeTrackerApp:
 
     def update_visualization(self):
         self.fig.clear()
+        trades = self.trades.frame()
     
-        if self.trades.empty or not all(col in self.trades.columns for col in ["Monte Carlo Risk", "VaR", "CVaR", "Risk Parity"]):
+        if trades.empty or not all(col in trades.columns for col in ["Monte Carlo Risk", "VaR", "CVaR", "Risk Parity"]):
             # Show a message if there's no data to visualize
             ax = self.fig.add_subplot(111)
             ax.text(0.5, 0.5, "No data available for visualization", 
@@ -654,7 +520,7 @@ class TradeTrackerApp:
     
         # Subplot 1: Portfolio Risk Summary (Bar Chart)
         ax1 = self.fig.add_subplot(121)
-        aggregated_risks = self.trades[["Monte Carlo Risk", "VaR", "CVaR", "Risk Parity"]].mean()
+        aggregated_risks = trades[["Monte Carlo Risk", "VaR", "CVaR", "Risk Parity"]].mean()
         ax1.bar(aggregated_risks.index, aggregated_risks.values, color=["#1E90FF", "#FF6347", "#3CB371", "#FFD700"])
         ax1.set_title("Average Risk by Model")
         ax1.set_ylabel("Risk Factor (Normalized)")
@@ -663,7 +529,7 @@ class TradeTrackerApp:
         # Subplot 2: Risk Distribution (Line Chart)
         ax2 = self.fig.add_subplot(122)
         for model in ["Monte Carlo Risk", "VaR", "CVaR", "Risk Parity"]:
-            self.trades[model].plot(kind="line", ax=ax2, label=model, alpha=0.7)
+            trades[model].plot(kind="line", ax=ax2, label=model, alpha=0.7)
         ax2.set_title("Risk Distribution Over Time")
         ax2.set_xlabel("Trade Index")
         ax2.set_ylabel("Risk Factor (Normalized)")
@@ -675,7 +541,7 @@ class TradeTrackerApp:
 
 
     def on_close(self):
-        save_data(self.trades)
+        self.journal.close()
         self.root.destroy()
 
 if __name__ == "__main__":
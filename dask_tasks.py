@@ -1,33 +1,38 @@
-from tqdm import tqdm
-import pandas as pd
-import random
-from risk_calculations import (
-    monte_carlo_risk_simulation,
-    value_at_risk,
-    conditional_value_at_risk,
-    risk_parity,
-    calculate_final_risk,
-)
-
-def generate_single_batch_dask(num_iterations, size_range, value_range, output_file):
+from dask.distributed import Client, Event, LocalCluster, get_worker
+
+from training_core import run_training_task
+
+# Dask Event the training tasks poll between chunks
+ABORT_EVENT_NAME = "risk-training-abort"
+
+_client = None
+_client_address = None
+
+
+def get_dask_client(scheduler_address=None, num_processes=None):
+    """
+    Dask client reused across training runs.
+
+    Connects to the scheduler at `scheduler_address` (e.g. "tcp://10.0.0.5:8786")
+    when given, otherwise starts a LocalCluster with `num_processes` workers
+    the first time and keeps it for later runs.
+    """
+    global _client, _client_address
+    if _client is None or _client.status == "closed" or _client_address != scheduler_address:
+        if _client is not None:
+            _client.close()
+        if scheduler_address:
+            _client = Client(scheduler_address)
+        else:
+            _client = Client(LocalCluster(n_workers=num_processes, threads_per_worker=1))
+        _client_address = scheduler_address
+    return _client
+
+
+def run_training_task_dask(task, abort_event_name=ABORT_EVENT_NAME):
     """
-    Generates a batch of training data, calculates risks, and saves intermediate results to disk.
+    Dask task: training_core.run_training_task, stopping early once the named dask Event is set.
+    Returns the task's result and the address of the worker that ran it.
     """
-    results = []
-    for _ in tqdm(range(num_iterations), desc="Generating batches", ncols=100):
-        trade_size = random.randint(*size_range)
-        trade_value = random.randint(*value_range)
-
-        monte_carlo = monte_carlo_risk_simulation(trade_size, trade_value)
-        var = value_at_risk(trade_value)
-        cvar = conditional_value_at_risk(trade_value)
-        risk_parity_value = risk_parity(trade_value)
-        final_risk = calculate_final_risk(monte_carlo, var, cvar, risk_parity_value)
-
-        results.append({"Final Risk": final_risk})
-
-    # Save intermediate results to disk
-    try:
-        pd.DataFrame(results).to_csv(output_file, index=False)
-    except Exception as e:
-        logging.error(f"Error saving batch data to {output_file}: {e}")
+    abort_event = Event(abort_event_name)
+    return run_training_task(task, abort_event.is_set), get_worker().address
@@ -0,0 +1,137 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from risk_calculations import (
+    RISK_ENGINES,
+    get_engine,
+    value_at_risk_batch,
+    conditional_value_at_risk_batch,
+)
+from sample_pool import StandardNormalPool
+
+# Largest allowed gap between matching quantiles of the two output distributions.
+# The Monte Carlo estimate of a 5% tail from 10,000 draws carries a standard
+# error of roughly 0.001 in normalized units, so 0.005 leaves ample headroom.
+DEFAULT_TOLERANCE = 0.005
+COMPARED_QUANTILES = np.linspace(0.05, 0.95, 19)
+
+
+def compare_distributions(reference, candidate, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare two samples of a risk metric quantile by quantile.
+    """
+    reference_quantiles = np.quantile(reference, COMPARED_QUANTILES)
+    candidate_quantiles = np.quantile(candidate, COMPARED_QUANTILES)
+    max_gap = float(np.max(np.abs(reference_quantiles - candidate_quantiles)))
+    return {
+        "reference_mean": float(np.mean(reference)),
+        "candidate_mean": float(np.mean(candidate)),
+        "max_quantile_gap": max_gap,
+        "passed": max_gap <= tolerance,
+    }
+
+
+def validate_analytic_method(num_trades=5000, value_range=(1, 50000), tolerance=DEFAULT_TOLERANCE, seed=0):
+    """
+    Check that the analytic VaR/CVaR output distributions match the Monte Carlo ones.
+    """
+    rng = np.random.default_rng(seed)
+    trade_values = rng.integers(value_range[0], value_range[1], size=num_trades, endpoint=True)
+
+    report = {}
+    for name, batch_fn in (("VaR", value_at_risk_batch), ("CVaR", conditional_value_at_risk_batch)):
+        start = time.perf_counter()
+        monte_carlo = batch_fn(trade_values, method="monte_carlo", rng=rng)
+        monte_carlo_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analytic = batch_fn(trade_values, method="analytic", rng=rng)
+        analytic_time = time.perf_counter() - start
+
+        report[name] = compare_distributions(monte_carlo, analytic, tolerance)
+        report[name]["monte_carlo_seconds"] = monte_carlo_time
+        report[name]["analytic_seconds"] = analytic_time
+    return report
+
+
+def _random_trades(rng, num_trades, size_range=(1, 1000), value_range=(1, 50000)):
+    trade_sizes = rng.integers(size_range[0], size_range[1], size=num_trades, endpoint=True)
+    trade_values = rng.integers(value_range[0], value_range[1], size=num_trades, endpoint=True)
+    return trade_sizes, trade_values
+
+
+def validate_engines(num_trades=5000, tolerance=DEFAULT_TOLERANCE, seed=0, reference="numpy"):
+    """
+    Check that every registered engine's final-risk distribution matches the reference engine.
+    """
+    rng = np.random.default_rng(seed)
+    trade_sizes, trade_values = _random_trades(rng, num_trades)
+    expected = get_engine(reference).evaluate(trade_sizes, trade_values, rng=rng)["final_risk"]
+
+    report = {}
+    for name in RISK_ENGINES:
+        if name != reference:
+            actual = get_engine(name).evaluate(trade_sizes, trade_values, rng=rng)["final_risk"]
+            report[name] = compare_distributions(expected, actual, tolerance)
+    return report
+
+
+def benchmark_engines(num_trades=20000, engines=None, use_pool=True, seed=0):
+    """
+    Trades per second of each engine on one core, after a small warm-up call (JIT compilation).
+    """
+    rng = np.random.default_rng(seed)
+    trade_sizes, trade_values = _random_trades(rng, num_trades)
+    pool = StandardNormalPool(seed=rng) if use_pool else None
+
+    timings = {}
+    for name in engines or RISK_ENGINES:
+        engine = get_engine(name)
+        engine.evaluate(trade_sizes[:10], trade_values[:10], rng=rng, pool=pool)
+        start = time.perf_counter()
+        engine.evaluate(trade_sizes, trade_values, rng=rng, pool=pool)
+        elapsed = time.perf_counter() - start
+        timings[name] = {
+            "seconds": elapsed,
+            "trades_per_second": num_trades / elapsed,
+            "compiled": getattr(engine, "compiled", False),
+        }
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and benchmark the risk engines")
+    parser.add_argument("--benchmark", action="store_true", help="also time every registered engine")
+    parser.add_argument("--trades", type=int, default=20000, help="trades per benchmark run")
+    parser.add_argument("--no-pool", action="store_true", help="benchmark without the standard-normal pool")
+    args = parser.parse_args(argv)
+
+    tolerance = DEFAULT_TOLERANCE
+    report = validate_analytic_method(tolerance=tolerance)
+    for name, result in report.items():
+        status = "PASS" if result["passed"] else "FAIL"
+        print(
+            f"{name}: {status} max quantile gap {result['max_quantile_gap']:.5f} (tolerance {tolerance}), "
+            f"mean {result['reference_mean']:.5f} vs {result['candidate_mean']:.5f}, "
+            f"{result['monte_carlo_seconds']:.2f}s Monte Carlo vs {result['analytic_seconds']:.4f}s analytic"
+        )
+
+    engine_report = validate_engines(tolerance=tolerance)
+    for name, result in engine_report.items():
+        status = "PASS" if result["passed"] else "FAIL"
+        print(f"engine {name}: {status} final-risk max quantile gap {result['max_quantile_gap']:.5f} vs numpy")
+
+    if args.benchmark:
+        for name, timing in benchmark_engines(args.trades, use_pool=not args.no_pool).items():
+            compiled = " (compiled)" if timing["compiled"] else ""
+            print(f"{name}{compiled}: {timing['trades_per_second']:,.0f} trades/s ({timing['seconds']:.2f}s)")
+
+    results = list(report.values()) + list(engine_report.values())
+    return 0 if all(result["passed"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+import pandas as pd
+
+from threshold_store import RISK_COLORS, RISK_LEVELS
+
+# Treeview column -> trade DataFrame column it displays (and sorts by)
+HISTORY_COLUMNS = {
+    "Date": "Date",
+    "Ticker": "Ticker",
+    "Size": "Trade Size",
+    "Value": "Trade Value",
+    "Monte Carlo": "Monte Carlo Risk",
+    "VaR": "VaR",
+    "CVaR": "CVaR",
+    "Risk Parity": "Risk Parity",
+    "Final Risk": "Final Risk Factor",
+    "Risk Level": "Final Risk Factor",
+}
+TRADE_COLUMNS = list(dict.fromkeys(HISTORY_COLUMNS.values()))
+COLUMN_WIDTHS = {
+    "Date": 150,
+    "Ticker": 100,
+    "Size": 100,
+    "Value": 150,
+    "Monte Carlo": 150,
+    "VaR": 150,
+    "CVaR": 150,
+    "Risk Parity": 150,
+    "Final Risk": 150,
+    "Risk Level": 100,
+}
+ALL_LEVELS = "All"
+DEFAULT_ROW_HEIGHT = 20
+
+
+def format_date(date):
+    if isinstance(date, pd.Timestamp):
+        return date.strftime('%Y-%m-%d')
+    return str(date)
+
+
+def parse_date(text):
+    """
+    Date typed into a filter field, or None while it is empty or not (yet) a valid date.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return pd.Timestamp(text)
+    except (ValueError, TypeError):
+        return None
+
+
+class HistoryModel:
+    """
+    Filtered, sorted view of the trade DataFrame, read one window of rows at a time.
+
+    `order` holds the DataFrame row positions in display order; it is rebuilt
+    only when the trades, the filter or the sort change, never per scroll.
+    The ticker and date filters are answered by `query(ticker, start, end)`,
+    which returns the matching row positions (TradeJournal.positions, so
+    they run against the journal's indexes). `levels` holds the risk level
+    index of every trade, classified for the whole Final Risk Factor column at once.
+    """
+
+    def __init__(self, threshold_store, query, trades=None):
+        self.threshold_store = threshold_store
+        self.query = query
+        self.trades = trades if trades is not None else pd.DataFrame(columns=TRADE_COLUMNS)
+        self.ticker_filter = ""
+        self.start_filter = None
+        self.end_filter = None
+        self.level_filter = ALL_LEVELS
+        self.sort_column = None
+        self.descending = False
+        self._order = None
+        self._levels = None
+
+    def set_trades(self, trades):
+        self.trades = trades
+        self._order = None
+        self._levels = None
+
+    def set_filter(self, ticker="", start=None, end=None, level=ALL_LEVELS):
+        self.ticker_filter = ticker.strip()
+        self.start_filter = start
+        self.end_filter = end
+        self.level_filter = level
+        self._order = None
+
+    def sort_by(self, column):
+        """
+        Sort by a Treeview column; sorting by the same column again flips the direction.
+        """
+        self.descending = not self.descending if column == self.sort_column else False
+        self.sort_column = column
+        self._order = None
+
+    @property
+    def levels(self):
+        if self._levels is None:
+            self._levels = self.threshold_store.classify(self.trades["Final Risk Factor"].to_numpy(dtype=float))
+        return self._levels
+
+    def refresh_levels(self):
+        """
+        Reclassify every trade against the current thresholds; returns the positions whose level changed.
+        """
+        previous = self.levels
+        self._levels = None
+        changed = np.flatnonzero(self.levels != previous)
+        if len(changed) and self.level_filter != ALL_LEVELS:
+            self._order = None  # Rows may have moved in or out of the filtered level
+        return changed
+
+    @property
+    def order(self):
+        if self._order is None:
+            self._order = self._build_order()
+        return self._order
+
+    def _build_order(self):
+        rows = np.arange(len(self.trades))
+        if self.ticker_filter or self.start_filter is not None or self.end_filter is not None:
+            rows = self.query(self.ticker_filter, self.start_filter, self.end_filter)
+            rows = rows[rows < len(self.trades)]
+        if self.level_filter != ALL_LEVELS:
+            rows = rows[self.levels[rows] == RISK_LEVELS.index(self.level_filter)]
+        if self.sort_column is not None and len(rows):
+            keys = self.trades[HISTORY_COLUMNS[self.sort_column]].iloc[rows].reset_index(drop=True)
+            if self.sort_column == "Date":
+                keys = pd.to_datetime(keys, errors="coerce")
+            positions = keys.sort_values(ascending=not self.descending, kind="stable").index.to_numpy()
+            rows = rows[positions]
+        return rows
+
+    def __len__(self):
+        return len(self.order)
+
+    def window(self, first, count):
+        """
+        DataFrame row positions, display values and risk levels of `count` rows starting at `first`.
+        """
+        positions = self.order[first:first + count]
+        frame = self.trades.iloc[positions][TRADE_COLUMNS]
+        levels = [RISK_LEVELS[level] for level in self.levels[positions]]
+        rows = []
+        for trade, level in zip(frame.itertuples(index=False, name=None), levels):
+            date, ticker, size, value, monte_carlo, var, cvar, risk_parity, final_risk = trade
+            rows.append((
+                format_date(date), ticker, size, value, f"{monte_carlo:.2f}",
+                f"{var:.2f}", f"{cvar:.2f}", f"{risk_parity:.2f}", f"{final_risk:.2f}", level
+            ))
+        return positions, rows
+
+
+class HistoryView:
+    """
+    Trade history Treeview that only ever holds the rows currently on screen.
+
+    Scrolling, sorting (click a heading) and filtering (ticker prefix, date
+    range and risk level) run against the HistoryModel; the Treeview keeps one item per
+    visible line and rewrites their values as the window moves.
+    """
+
+    def __init__(self, parent, threshold_store, query, background=None):
+        self.model = HistoryModel(threshold_store, query)
+        self.first = 0
+        self.page_size = 1
+        self.items = []
+        self.positions = np.arange(0)
+
+        controls = tk.Frame(parent, bg=background)
+        controls.pack(side="top", fill="x", padx=10)
+        ttk.Label(controls, text="Filter ticker:", background=background, foreground="white").pack(side="left")
+        self.ticker_var = tk.StringVar()
+        self.ticker_var.trace_add("write", lambda *_: self.apply_filter())
+        ttk.Entry(controls, textvariable=self.ticker_var, width=12).pack(side="left", padx=5)
+        ttk.Label(controls, text="From:", background=background, foreground="white").pack(side="left", padx=(10, 0))
+        self.start_var = tk.StringVar()
+        self.start_var.trace_add("write", lambda *_: self.apply_filter())
+        ttk.Entry(controls, textvariable=self.start_var, width=11).pack(side="left", padx=5)
+        ttk.Label(controls, text="To:", background=background, foreground="white").pack(side="left")
+        self.end_var = tk.StringVar()
+        self.end_var.trace_add("write", lambda *_: self.apply_filter())
+        ttk.Entry(controls, textvariable=self.end_var, width=11).pack(side="left", padx=5)
+        ttk.Label(controls, text="Risk level:", background=background, foreground="white").pack(side="left", padx=(10, 0))
+        self.level_selector = ttk.Combobox(controls, values=(ALL_LEVELS,) + RISK_LEVELS, state="readonly", width=8)
+        self.level_selector.set(ALL_LEVELS)
+        self.level_selector.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+        self.level_selector.pack(side="left", padx=5)
+        self.count_label = tk.Label(controls, text="", background=background, foreground="white")
+        self.count_label.pack(side="right")
+
+        self.scrollbar = ttk.Scrollbar(parent, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.hscrollbar = ttk.Scrollbar(parent, orient="horizontal")
+        self.hscrollbar.pack(side="bottom", fill="x")
+
+        self.tree = ttk.Treeview(parent, columns=tuple(HISTORY_COLUMNS), show="headings",
+                                 xscrollcommand=self.hscrollbar.set)
+        self.hscrollbar.config(command=self.tree.xview)
+        for col, width in COLUMN_WIDTHS.items():
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=width, anchor="center")
+        for level, color in RISK_COLORS.items():
+            self.tree.tag_configure(level, background=color, foreground="white")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+
+    def set_trades(self, trades, scroll_to_end=False):
+        self.model.set_trades(trades)
+        if scroll_to_end:
+            self.first = len(self.model)  # Clamped to the last page by render()
+        self.render()
+
+    def apply_filter(self):
+        self.model.set_filter(self.ticker_var.get(), parse_date(self.start_var.get()),
+                              parse_date(self.end_var.get()), self.level_selector.get())
+        self.first = 0
+        self.render()
+
+    def sort_by(self, column):
+        self.model.sort_by(column)
+        for col in HISTORY_COLUMNS:
+            arrow = (" ▼" if self.model.descending else " ▲") if col == column else ""
+            self.tree.heading(col, text=col + arrow)
+        self.first = 0
+        self.render()
+
+    def refresh_levels(self):
+        """
+        Apply new thresholds, touching only the visible rows whose risk level changed.
+        """
+        changed = self.model.refresh_levels()
+        if not len(changed):
+            return
+        if self.model.level_filter != ALL_LEVELS:
+            self.render()  # The filtered rows themselves changed
+            return
+        visible = np.isin(self.positions, changed)
+        for item, position in zip(np.asarray(self.items)[visible], self.positions[visible]):
+            level = RISK_LEVELS[self.model.levels[position]]
+            self.tree.set(item, "Risk Level", level)
+            self.tree.item(item, tags=(level,))
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+        page_size = max(1, (event.height - row_height) // row_height)  # Minus the heading row
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.render()
+
+    def yview(self, *args):
+        """
+        Scrollbar command: ("moveto", fraction) or ("scroll", n, "units" | "pages").
+        """
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.model))
+            self.render()
+        elif args[0] == "scroll":
+            self.scroll(int(args[1]), args[2])
+
+    def scroll(self, amount, what="units"):
+        self.first += amount * (self.page_size if what == "pages" else 1)
+        self.render()
+
+    def render(self):
+        total = len(self.model)
+        self.first = max(0, min(self.first, total - self.page_size))
+        positions, rows = self.model.window(self.first, self.page_size)
+
+        # Reuse the existing items and only add or drop the difference
+        while len(self.items) < len(rows):
+            self.items.append(self.tree.insert("", "end"))
+        while len(self.items) > len(rows):
+            self.tree.delete(self.items.pop())
+        for item, values in zip(self.items, rows):
+            self.tree.item(item, values=values, tags=(values[-1],))
+        self.positions = positions
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + len(rows)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.count_label.config(text=f"{total} of {len(self.model.trades)} trades")
@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+
+_process_rng = None
+_process_rng_pid = None
+
+
+def get_process_rng():
+    """
+    Per-process numpy Generator, re-created from fresh OS entropy after a fork.
+
+    Used whenever a caller does not pass its own Generator, so forked workers
+    never continue from the parent's (identical) RNG state.
+    """
+    global _process_rng, _process_rng_pid
+    if _process_rng is None or _process_rng_pid != os.getpid():
+        _process_rng = np.random.default_rng()
+        _process_rng_pid = os.getpid()
+    return _process_rng
+
+
+def spawn_seeds(seed, count):
+    """
+    Independent SeedSequence children of `seed` (an int, None or a SeedSequence).
+
+    The same seed always yields the same children, so a run split across
+    `count` tasks is reproducible no matter which worker executes which task.
+    """
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return root.spawn(count)
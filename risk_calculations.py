@@ -1,69 +1,589 @@
+from functools import lru_cache
+from statistics import NormalDist
+
+import time
+
 import numpy as np
 
-def monte_carlo_risk_simulation(trade_size, trade_value, num_simulations=10000):
-    if trade_value <= 0 or trade_size <= 0:
-        return 0
+from random_streams import get_process_rng
+from risk_kernels import NUMBA_AVAILABLE, risk_kernel
+from tail_statistics import quantile, lower_tail_mean, ragged_quantile, order_statistics, smallest_sorted
+
+DEFAULT_NUM_SIMULATIONS = 10000
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # Bytes of simulation matrix held per chunk
+
+# Adaptive mode: draw in growing increments until the standard error of every
+# tail estimate (normalized units) is below the tolerance or the cap is reached.
+# 0.005 needs about as many draws as the fixed 10,000 on typical trades.
+DEFAULT_TOLERANCE = 0.005
+DEFAULT_SIMULATION_STEP = 1000
+DEFAULT_MAX_SIMULATIONS = 100000
+_Z_95 = NormalDist().inv_cdf(0.975)  # Half-width multiplier of a 95% interval
+
+# "monte_carlo" samples every trade; "analytic" uses closed-form normal tail
+# statistics for VaR and CVaR (the Monte Carlo risk model is always sampled).
+RISK_METHODS = ("monte_carlo", "analytic")
+
+RISK_WEIGHTS = {
+    "monte_carlo": 0.3,
+    "var": 0.3,
+    "cvar": 0.2,
+    "risk_parity": 0.2
+}
+
+
+def _chunk_rows(num_simulations, memory_budget):
+    """
+    Number of trades whose simulation rows fit in the memory budget (at least one).
+    """
+    return max(1, int(memory_budget // (num_simulations * 8)))
+
+
+def _check_method(method):
+    if method not in RISK_METHODS:
+        raise ValueError(f"Unknown risk method {method!r}; expected one of {RISK_METHODS}")
+
+
+@lru_cache(maxsize=None)
+def standard_normal_tail(confidence_level):
+    """
+    Standard-normal quantile and lower-tail mean at 1 - confidence_level.
+
+    VaR and CVaR of N(0.01 * v, sigma * v) normalized by v are
+    |0.01 + sigma * quantile| and |0.01 + sigma * tail_mean|, so these two
+    constants are all the analytic method needs.
+    """
+    alpha = 1 - confidence_level
+    quantile = NormalDist().inv_cdf(alpha)
+    tail_mean = -NormalDist().pdf(quantile) / alpha
+    return quantile, tail_mean
+
+
+def _simulate(rng, loc, scale, num_simulations, pool=None):
+    """
+    Draw one row of normal samples per trade, shaped (len(loc), num_simulations).
+
+    With a sample_pool.StandardNormalPool the standard-normal block is taken
+    from the pool and only shifted and scaled here.
+    """
+    if pool is not None:
+        simulations = pool.draw(len(loc), num_simulations)
+    else:
+        simulations = rng.standard_normal((len(loc), num_simulations))
+    simulations *= scale[:, None]
+    simulations += loc[:, None]
+    return simulations
+
+
+def _monte_carlo_chunk(rng, trade_values, num_simulations, pool=None):
+    mean_return = rng.uniform(-0.05, 0.05, size=len(trade_values))  # Between -5% and +5%
+    volatility = rng.uniform(0.05, 0.25, size=len(trade_values))   # Between 5% and 25%
+    scale = trade_values * volatility
+
+    simulations = _simulate(rng, trade_values * mean_return, scale, num_simulations, pool)
+    loss_counts = np.count_nonzero(simulations < 0, axis=1)
+
+    # The 95th percentile of the (negative) losses is the 5th percentile of
+    # their magnitudes; non-losses are pushed behind them as +inf.
+    magnitudes = np.negative(simulations, out=simulations)
+    magnitudes[magnitudes <= 0] = np.inf
+    percentile_loss = ragged_quantile(magnitudes, 0.05, loss_counts)
+
+    # Rows without any loss are floored to 0.01 below.
+    percentile_loss[loss_counts == 0] = 0
+    normalized_risk = percentile_loss / scale
+    return np.clip(normalized_risk, 0.01, 1)  # Clamp between 0.01 and 1
+
+
+def _value_at_risk_chunk(rng, trade_values, confidence_level, num_simulations, method="monte_carlo", pool=None):
+    volatility = rng.uniform(0.03, 0.07, size=len(trade_values))
+    if method == "analytic":
+        normal_quantile, _ = standard_normal_tail(confidence_level)
+        return np.clip(np.abs(0.01 + volatility * normal_quantile), 0, 1)  # Clamp to [0, 1]
+
+    scale = trade_values * volatility
+    losses = _simulate(rng, trade_values * 0.01, scale, num_simulations, pool)
+    var_threshold = quantile(losses, 1 - confidence_level)
+    var = np.abs(var_threshold) / trade_values
+    return np.clip(var, 0, 1)  # Clamp to [0, 1]
+
+
+def _conditional_value_at_risk_chunk(rng, trade_values, confidence_level, num_simulations, method="monte_carlo",
+                                     pool=None):
+    volatility = rng.uniform(0.03, 0.07, size=len(trade_values))
+    if method == "analytic":
+        _, tail_mean = standard_normal_tail(confidence_level)
+        return np.clip(np.abs(0.01 + volatility * tail_mean), 0, 1)  # Clamp to [0, 1]
+
+    scale = trade_values * volatility
+    losses = _simulate(rng, trade_values * 0.01, scale, num_simulations, pool)
+    var_index = int((1 - confidence_level) * num_simulations)
+    cvar = lower_tail_mean(losses, var_index)
+    normalized_cvar = np.abs(cvar) / trade_values
+    return np.clip(normalized_cvar, 0, 1)  # Clamp to [0, 1]
+
 
-    mean_return = np.random.uniform(-0.05, 0.05)  # Between -5% and +5%
-    volatility = np.random.uniform(0.05, 0.25)   # Between 5% and 25%
+def _risk_parity_chunk(rng, trade_values):
+    risk_parity_value = trade_values * rng.uniform(0.05, 0.15, size=len(trade_values)) / (trade_values + 10)
+    return np.clip(risk_parity_value, 0, 1)  # Clamp to [0, 1]
 
-    simulations = np.random.normal(
-        loc=trade_value * mean_return,
-        scale=trade_value * volatility,
-        size=num_simulations
+
+def _apply_chunked(chunk_fn, rng, valid, trade_values, rows):
+    """
+    Run chunk_fn(rng, values) over the valid trades in slices of `rows`; invalid trades score 0.
+    """
+    rng = rng if rng is not None else get_process_rng()
+    result = np.zeros(len(trade_values))
+    indices = np.flatnonzero(valid)
+    for start in range(0, len(indices), rows):
+        chunk = indices[start:start + rows]
+        result[chunk] = chunk_fn(rng, trade_values[chunk])
+    return result
+
+
+def monte_carlo_risk_batch(trade_sizes, trade_values, num_simulations=DEFAULT_NUM_SIMULATIONS,
+                           memory_budget=DEFAULT_MEMORY_BUDGET, pool=None, rng=None):
+    """
+    Vectorized monte_carlo_risk_simulation over arrays of trade sizes and values.
+    """
+    trade_sizes = np.asarray(trade_sizes, dtype=float)
+    trade_values = np.asarray(trade_values, dtype=float)
+    return _apply_chunked(
+        lambda rng, values: _monte_carlo_chunk(rng, values, num_simulations, pool),
+        rng,
+        (trade_values > 0) & (trade_sizes > 0),
+        trade_values,
+        _chunk_rows(num_simulations, memory_budget)
     )
 
-    losses = simulations[simulations < 0]
-    if len(losses) == 0:
-        return 0.01
-
-    percentile_loss = -np.percentile(losses, 95)
-    normalized_risk = percentile_loss / (trade_value * volatility)
-    return min(max(normalized_risk, 0.01), 1)  # Clamp between 0.01 and 1
-
-def value_at_risk(trade_value, confidence_level=0.95, num_simulations=10000):
-    if trade_value <= 0:
-        return 0
-    losses = np.random.normal(
-        loc=trade_value * 0.01,
-        scale=trade_value * np.random.uniform(0.03, 0.07),
-        size=num_simulations
+
+def value_at_risk_batch(trade_values, confidence_level=0.95, num_simulations=DEFAULT_NUM_SIMULATIONS,
+                        memory_budget=DEFAULT_MEMORY_BUDGET, method="monte_carlo", pool=None,
+                        rng=None):
+    """
+    Vectorized value_at_risk over an array of trade values.
+    """
+    _check_method(method)
+    trade_values = np.asarray(trade_values, dtype=float)
+    return _apply_chunked(
+        lambda rng, values: _value_at_risk_chunk(rng, values, confidence_level, num_simulations, method, pool),
+        rng,
+        trade_values > 0,
+        trade_values,
+        _chunk_rows(num_simulations, memory_budget)
+    )
+
+
+def conditional_value_at_risk_batch(trade_values, confidence_level=0.95, num_simulations=DEFAULT_NUM_SIMULATIONS,
+                                    memory_budget=DEFAULT_MEMORY_BUDGET, method="monte_carlo", pool=None,
+                                    rng=None):
+    """
+    Vectorized conditional_value_at_risk over an array of trade values.
+    """
+    _check_method(method)
+    trade_values = np.asarray(trade_values, dtype=float)
+    return _apply_chunked(
+        lambda rng, values: _conditional_value_at_risk_chunk(rng, values, confidence_level, num_simulations,
+                                                             method, pool),
+        rng,
+        trade_values > 0,
+        trade_values,
+        _chunk_rows(num_simulations, memory_budget)
     )
-    var_threshold = np.percentile(losses, (1 - confidence_level) * 100)
-    var = abs(var_threshold) / trade_value
-    return min(max(var, 0), 1)  # Clamp to [0, 1]
-
-def conditional_value_at_risk(trade_value, confidence_level=0.95, num_simulations=10000):
-    if trade_value <= 0:
-        return 0
-    losses = np.random.normal(
-        loc=trade_value * 0.01,
-        scale=trade_value * np.random.uniform(0.03, 0.07),
-        size=num_simulations
+
+
+def risk_parity_batch(trade_values, rng=None):
+    """
+    Vectorized risk_parity over an array of trade values.
+    """
+    trade_values = np.asarray(trade_values, dtype=float)
+    return _apply_chunked(_risk_parity_chunk, rng, trade_values > 0, trade_values, max(1, len(trade_values)))
+
+
+def calculate_final_risk_batch(monte_carlo, var, cvar, risk_parity):
+    """
+    Vectorized calculate_final_risk over arrays of the four risk metrics.
+    """
+    combined_risk = (
+        np.asarray(monte_carlo) * RISK_WEIGHTS["monte_carlo"] +
+        np.asarray(var) * RISK_WEIGHTS["var"] +
+        np.asarray(cvar) * RISK_WEIGHTS["cvar"] +
+        np.asarray(risk_parity) * RISK_WEIGHTS["risk_parity"]
     )
-    losses_sorted = np.sort(losses)
-    var_index = int((1 - confidence_level) * len(losses_sorted))
-    cvar = np.mean(losses_sorted[:var_index]) if var_index > 0 else 0
-    normalized_cvar = abs(cvar) / trade_value
-    return min(max(normalized_cvar, 0), 1)  # Clamp to [0, 1]
-
-def risk_parity(trade_value):
-    if trade_value <= 0:
-        return 0
-    risk_parity_value = trade_value * np.random.uniform(0.05, 0.15) / (trade_value + 10)
-    return min(max(risk_parity_value, 0), 1)  # Clamp to [0, 1]
+    return np.clip(combined_risk, 0, 1)  # Clamp to [0, 1]
+
+
+def risk_batch(trade_sizes, trade_values, num_simulations=DEFAULT_NUM_SIMULATIONS,
+               memory_budget=DEFAULT_MEMORY_BUDGET, method="monte_carlo", pool=None, rng=None):
+    """
+    Compute all four risk metrics and the final risk for arrays of trades.
+
+    Trades are processed in chunks so that a single simulation matrix never
+    exceeds `memory_budget` bytes. `method` selects how VaR and CVaR are
+    evaluated (see RISK_METHODS), `pool` optionally supplies the normal
+    draws (see sample_pool) and `rng` is the numpy Generator for every other
+    draw (defaults to the per-process generator). Returns a dict of arrays
+    keyed like RISK_WEIGHTS plus "final_risk".
+    """
+    _check_method(method)
+    rng = rng if rng is not None else get_process_rng()
+    trade_sizes = np.asarray(trade_sizes, dtype=float)
+    trade_values = np.asarray(trade_values, dtype=float)
+    rows = _chunk_rows(num_simulations, memory_budget)
+
+    results = {key: np.zeros(len(trade_values)) for key in RISK_WEIGHTS}
+    for start in range(0, len(trade_values), rows):
+        chunk = slice(start, start + rows)
+        sizes, values = trade_sizes[chunk], trade_values[chunk]
+        results["monte_carlo"][chunk] = monte_carlo_risk_batch(sizes, values, num_simulations, memory_budget,
+                                                               pool, rng)
+        results["var"][chunk] = value_at_risk_batch(values, num_simulations=num_simulations,
+                                                    memory_budget=memory_budget, method=method, pool=pool, rng=rng)
+        results["cvar"][chunk] = conditional_value_at_risk_batch(values, num_simulations=num_simulations,
+                                                                 memory_budget=memory_budget, method=method,
+                                                                 pool=pool, rng=rng)
+        results["risk_parity"][chunk] = risk_parity_batch(values, rng)
+
+    results["final_risk"] = calculate_final_risk_batch(
+        results["monte_carlo"], results["var"], results["cvar"], results["risk_parity"]
+    )
+    return results
+
+
+def _quantile_with_error(samples, q):
+    """
+    Interpolated q quantile of each row plus a distribution-free standard error.
+
+    The error comes from the order statistics bracketing a 95% binomial
+    confidence interval around the quantile position.
+    """
+    n = samples.shape[1]
+    position = q * (n - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, n - 1)
+    spread = _Z_95 * np.sqrt(n * q * (1 - q))
+    bracket_low = max(int(np.floor(position - spread)), 0)
+    bracket_high = min(int(np.ceil(position + spread)), n - 1)
+
+    values = order_statistics(samples, (lower, upper, bracket_low, bracket_high))
+    estimate = values[:, 0] + (values[:, 1] - values[:, 0]) * (position - lower)
+    error = (values[:, 3] - values[:, 2]) / (2 * _Z_95)
+    return estimate, error
+
+
+def _ragged_quantile_with_error(magnitudes, q, counts):
+    """
+    Like _quantile_with_error over the first counts[i] values of each row (the rest +inf).
+    """
+    last = np.maximum(counts - 1, 0)
+    position = q * last
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, last)
+    spread = _Z_95 * np.sqrt(counts * q * (1 - q))
+    bracket_low = np.maximum(np.floor(position - spread), 0).astype(np.intp)
+    bracket_high = np.minimum(np.ceil(position + spread), last).astype(np.intp)
+
+    head = smallest_sorted(magnitudes, int(bracket_high.max(initial=0)) + 1)
+    take = lambda index: np.take_along_axis(head, index[:, None], axis=1)[:, 0]
+    with np.errstate(invalid="ignore"):  # Empty rows give inf - inf; np.where below replaces them
+        estimate = take(lower) + (take(upper) - take(lower)) * (position - lower)
+        error = (take(bracket_high) - take(bracket_low)) / (2 * _Z_95)
+    return np.where(counts > 0, estimate, 0.0), np.where(counts > 0, error, 0.0)
+
+
+def _adaptive_chunk(rng, trade_values, confidence_level, tolerance, step, max_simulations, pool):
+    rows = len(trade_values)
+    alpha = 1 - confidence_level
+    mean_return = rng.uniform(-0.05, 0.05, size=rows)
+    volatility = rng.uniform(0.05, 0.25, size=rows)
+    var_volatility = rng.uniform(0.03, 0.07, size=rows)
+    cvar_volatility = rng.uniform(0.03, 0.07, size=rows)
+
+    # Standard-normal draws per model; every metric is computed in normalized
+    # units (already divided by trade_value), so the tolerance applies directly.
+    draws = np.empty((3, rows, max_simulations))
+    results = {key: np.zeros(rows) for key in ("monte_carlo", "var", "cvar")}
+    simulations = np.full(rows, max_simulations)
+    active = np.arange(rows)
+
+    num_simulations = 0
+    while len(active) and num_simulations < max_simulations:
+        # Grow by half the current count (at least `step`) so re-evaluating stays ~linear overall
+        new = min(max(step, num_simulations // 2), max_simulations - num_simulations)
+        for model in range(3):
+            if pool is not None:
+                block = pool.draw(len(active), new)
+            else:
+                block = rng.standard_normal((len(active), new))
+            draws[model, active, num_simulations:num_simulations + new] = block
+        num_simulations += new
+
+        normalized = mean_return[active, None] / volatility[active, None] + draws[0, active, :num_simulations]
+        loss_counts = np.count_nonzero(normalized < 0, axis=1)
+        magnitudes = np.negative(normalized, out=normalized)
+        magnitudes[magnitudes <= 0] = np.inf
+        monte_carlo, monte_carlo_error = _ragged_quantile_with_error(magnitudes, 0.05, loss_counts)
+
+        losses = 0.01 + var_volatility[active, None] * draws[1, active, :num_simulations]
+        var, var_error = _quantile_with_error(losses, alpha)
+
+        losses = 0.01 + cvar_volatility[active, None] * draws[2, active, :num_simulations]
+        tail_count = max(int(alpha * num_simulations), 1)
+        cvar = lower_tail_mean(losses, tail_count)
+        cvar_error = losses[:, :tail_count].std(axis=1) / np.sqrt(tail_count)
+
+        results["monte_carlo"][active] = np.where(loss_counts > 0, monte_carlo, 0.01)
+        results["var"][active] = np.abs(var)
+        results["cvar"][active] = np.abs(cvar)
+
+        error = np.maximum(np.maximum(monte_carlo_error, var_error), cvar_error)
+        converged = error < tolerance
+        simulations[active[converged]] = num_simulations
+        active = active[~converged]
+
+    results["monte_carlo"] = np.clip(results["monte_carlo"], 0.01, 1)  # Clamp between 0.01 and 1
+    results["var"] = np.clip(results["var"], 0, 1)  # Clamp to [0, 1]
+    results["cvar"] = np.clip(results["cvar"], 0, 1)  # Clamp to [0, 1]
+    results["simulations"] = simulations
+    return results
+
+
+def adaptive_risk_batch(trade_sizes, trade_values, tolerance=DEFAULT_TOLERANCE, step=DEFAULT_SIMULATION_STEP,
+                        max_simulations=DEFAULT_MAX_SIMULATIONS, confidence_level=0.95,
+                        memory_budget=DEFAULT_MEMORY_BUDGET, pool=None, rng=None):
+    """
+    risk_batch with a per-trade simulation count chosen by convergence.
+
+    Each trade draws at least `step` more samples per model until the standard error
+    of its Monte Carlo, VaR and CVaR tail estimates is below `tolerance`
+    (normalized units) or `max_simulations` is reached. The result has the
+    same keys as risk_batch plus "simulations", the draws used per trade.
+    """
+    rng = rng if rng is not None else get_process_rng()
+    trade_sizes = np.asarray(trade_sizes, dtype=float)
+    trade_values = np.asarray(trade_values, dtype=float)
+    rows = _chunk_rows(3 * max_simulations, memory_budget)
+
+    results = {key: np.zeros(len(trade_values)) for key in RISK_WEIGHTS}
+    results["simulations"] = np.zeros(len(trade_values), dtype=np.int64)
+    indices = np.flatnonzero(trade_values > 0)
+    for start in range(0, len(indices), rows):
+        chunk = indices[start:start + rows]
+        chunk_results = _adaptive_chunk(rng, trade_values[chunk], confidence_level, tolerance, step,
+                                        max_simulations, pool)
+        for key, values in chunk_results.items():
+            results[key][chunk] = values
+    results["monte_carlo"][trade_sizes <= 0] = 0
+    results["risk_parity"] = risk_parity_batch(trade_values, rng)
+
+    results["final_risk"] = calculate_final_risk_batch(
+        results["monte_carlo"], results["var"], results["cvar"], results["risk_parity"]
+    )
+    return results
+
+
+def monte_carlo_risk_simulation(trade_size, trade_value, num_simulations=DEFAULT_NUM_SIMULATIONS, pool=None, rng=None):
+    return float(monte_carlo_risk_batch([trade_size], [trade_value], num_simulations, pool=pool, rng=rng)[0])
+
+def value_at_risk(trade_value, confidence_level=0.95, num_simulations=DEFAULT_NUM_SIMULATIONS, method="monte_carlo",
+                  pool=None, rng=None):
+    return float(value_at_risk_batch([trade_value], confidence_level, num_simulations, method=method, pool=pool,
+                                     rng=rng)[0])
+
+def conditional_value_at_risk(trade_value, confidence_level=0.95, num_simulations=DEFAULT_NUM_SIMULATIONS,
+                              method="monte_carlo", pool=None, rng=None):
+    return float(conditional_value_at_risk_batch([trade_value], confidence_level, num_simulations,
+                                                 method=method, pool=pool, rng=rng)[0])
+
+def risk_parity(trade_value, rng=None):
+    return float(risk_parity_batch([trade_value], rng)[0])
 
 def calculate_final_risk(monte_carlo, var, cvar, risk_parity):
-    weights = {
-        "monte_carlo": 0.3,
-        "var": 0.3,
-        "cvar": 0.2,
-        "risk_parity": 0.2
-    }
     combined_risk = (
-        monte_carlo * weights["monte_carlo"] +
-        var * weights["var"] +
-        cvar * weights["cvar"] +
-        risk_parity * weights["risk_parity"]
+        monte_carlo * RISK_WEIGHTS["monte_carlo"] +
+        var * RISK_WEIGHTS["var"] +
+        cvar * RISK_WEIGHTS["cvar"] +
+        risk_parity * RISK_WEIGHTS["risk_parity"]
     )
     return min(max(combined_risk, 0), 1)  # Clamp to [0, 1]
+
+
+# Engine registry: every engine evaluates arrays of trades and returns the
+# same dict of arrays as risk_batch, so callers can switch implementations by name.
+RISK_ENGINES = {}
+
+
+def register_engine(name):
+    def decorator(cls):
+        cls.name = name
+        RISK_ENGINES[name] = cls
+        return cls
+    return decorator
+
+
+def get_engine(name="numpy", **options):
+    """
+    Instantiate a registered risk engine by name.
+    """
+    if name not in RISK_ENGINES:
+        raise ValueError(f"Unknown risk engine {name!r}; expected one of {tuple(RISK_ENGINES)}")
+    return RISK_ENGINES[name](**options)
+
+
+class RiskEngine:
+    """
+    Base class for risk engines; subclasses implement _evaluate().
+
+    evaluate() keeps per-engine timing counters (calls, trades, seconds) so
+    callers can compare engines on live workloads.
+    """
+    name = None
+
+    def __init__(self, num_simulations=DEFAULT_NUM_SIMULATIONS, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.num_simulations = num_simulations
+        self.memory_budget = memory_budget
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.calls = 0
+        self.trades = 0
+        self.seconds = 0.0
+
+    def stats(self):
+        return {
+            "engine": self.name,
+            "calls": self.calls,
+            "trades": self.trades,
+            "seconds": self.seconds,
+            "trades_per_second": self.trades / self.seconds if self.seconds > 0 else 0.0,
+        }
+
+    def evaluate(self, trade_sizes, trade_values, rng=None, pool=None):
+        """
+        Risk metrics for arrays of trades, as a dict of arrays keyed like risk_batch's result.
+        """
+        start = time.perf_counter()
+        results = self._evaluate(trade_sizes, trade_values, rng, pool)
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+        self.trades += len(results["final_risk"])
+        return results
+
+    def evaluate_trade(self, trade_size, trade_value, rng=None, pool=None):
+        """
+        Risk metrics for a single trade, as a dict of floats.
+        """
+        results = self.evaluate([trade_size], [trade_value], rng, pool)
+        return {key: float(values[0]) for key, values in results.items()}
+
+    def _evaluate(self, trade_sizes, trade_values, rng, pool):
+        raise NotImplementedError
+
+
+@register_engine("scalar")
+class ScalarEngine(RiskEngine):
+    """
+    One trade at a time through the scalar risk functions (reference implementation).
+    """
+
+    def _evaluate(self, trade_sizes, trade_values, rng, pool):
+        rng = rng if rng is not None else get_process_rng()
+        results = {key: np.zeros(len(trade_values)) for key in RISK_WEIGHTS}
+        for i, (trade_size, trade_value) in enumerate(zip(trade_sizes, trade_values)):
+            results["monte_carlo"][i] = monte_carlo_risk_simulation(trade_size, trade_value, self.num_simulations,
+                                                                    pool=pool, rng=rng)
+            results["var"][i] = value_at_risk(trade_value, num_simulations=self.num_simulations, pool=pool, rng=rng)
+            results["cvar"][i] = conditional_value_at_risk(trade_value, num_simulations=self.num_simulations,
+                                                           pool=pool, rng=rng)
+            results["risk_parity"][i] = risk_parity(trade_value, rng=rng)
+        results["final_risk"] = calculate_final_risk_batch(
+            results["monte_carlo"], results["var"], results["cvar"], results["risk_parity"]
+        )
+        return results
+
+
+@register_engine("numpy")
+class NumpyEngine(RiskEngine):
+    """
+    Whole-matrix NumPy evaluation (risk_batch).
+    """
+    method = "monte_carlo"
+
+    def _evaluate(self, trade_sizes, trade_values, rng, pool):
+        return risk_batch(trade_sizes, trade_values, self.num_simulations, self.memory_budget,
+                          method=self.method, pool=pool, rng=rng)
+
+
+@register_engine("analytic")
+class AnalyticEngine(NumpyEngine):
+    """
+    NumPy evaluation with closed-form VaR and CVaR.
+    """
+    method = "analytic"
+
+
+@register_engine("numba")
+class NumbaEngine(RiskEngine):
+    """
+    Compiled kernel fusing all four models into one pass per trade; NumPy fallback without numba.
+    """
+
+    def __init__(self, num_simulations=DEFAULT_NUM_SIMULATIONS, memory_budget=DEFAULT_MEMORY_BUDGET):
+        super().__init__(num_simulations, memory_budget)
+        self.compiled = NUMBA_AVAILABLE
+        self._fallback = NumpyEngine(num_simulations, memory_budget)
+
+    def _evaluate(self, trade_sizes, trade_values, rng, pool):
+        if not self.compiled:
+            return self._fallback._evaluate(trade_sizes, trade_values, rng, pool)
+
+        rng = rng if rng is not None else get_process_rng()
+        trade_sizes = np.ascontiguousarray(trade_sizes, dtype=float)
+        trade_values = np.ascontiguousarray(trade_values, dtype=float)
+        if pool is not None:
+            pool_samples = np.asarray(pool.samples)
+            pool_offsets = pool.offsets(3 * len(trade_values), self.num_simulations).reshape(-1, 3)
+        else:
+            pool_samples = np.empty(1)
+            pool_offsets = np.full((len(trade_values), 3), -1, dtype=np.int64)
+
+        out = np.empty((len(trade_values), 5))
+        weights = np.array([RISK_WEIGHTS[key] for key in ("monte_carlo", "var", "cvar", "risk_parity")])
+        risk_kernel(trade_sizes, trade_values, self.num_simulations, 0.95, weights,
+                    rng, pool_samples, pool_offsets, out)
+        return {
+            "monte_carlo": out[:, 0],
+            "var": out[:, 1],
+            "cvar": out[:, 2],
+            "risk_parity": out[:, 3],
+            "final_risk": out[:, 4],
+        }
+
+
+@register_engine("adaptive")
+class AdaptiveEngine(RiskEngine):
+    """
+    NumPy evaluation drawing per trade until the tail estimates converge (adaptive_risk_batch).
+    """
+
+    def __init__(self, num_simulations=DEFAULT_MAX_SIMULATIONS, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 tolerance=DEFAULT_TOLERANCE, step=DEFAULT_SIMULATION_STEP):
+        super().__init__(num_simulations, memory_budget)
+        self.tolerance = tolerance
+        self.step = step
+
+    def reset_stats(self):
+        super().reset_stats()
+        self.simulations = 0
+
+    def stats(self):
+        stats = super().stats()
+        stats["mean_simulations"] = self.simulations / self.trades if self.trades else 0.0
+        return stats
+
+    def _evaluate(self, trade_sizes, trade_values, rng, pool):
+        results = adaptive_risk_batch(trade_sizes, trade_values, self.tolerance, self.step,
+                                      max_simulations=self.num_simulations, memory_budget=self.memory_budget,
+                                      pool=pool, rng=rng)
+        self.simulations += int(results["simulations"].sum())
+        return results
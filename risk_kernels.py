@@ -0,0 +1,144 @@
+import numpy as np
+
+# Compiled per-trade risk kernel used by the "numba" engine in risk_calculations.
+# numba is optional: without it NUMBA_AVAILABLE is False and the engine falls
+# back to the NumPy implementation.
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda function: function
+
+
+@njit(cache=True, nogil=True)
+def _select(a, n, k):
+    """
+    Reorder a[:n] in place so a[k] is its k-th smallest value, smaller ones before it; return a[k].
+    """
+    left, right = 0, n - 1
+    while left < right:
+        middle = (left + right) // 2
+        # Median-of-three pivot keeps already ordered runs from degrading
+        if a[middle] < a[left]:
+            a[middle], a[left] = a[left], a[middle]
+        if a[right] < a[left]:
+            a[right], a[left] = a[left], a[right]
+        if a[right] < a[middle]:
+            a[right], a[middle] = a[middle], a[right]
+        pivot = a[middle]
+
+        i, j = left, right
+        while i <= j:
+            while a[i] < pivot:
+                i += 1
+            while a[j] > pivot:
+                j -= 1
+            if i <= j:
+                a[i], a[j] = a[j], a[i]
+                i += 1
+                j -= 1
+        if k <= j:
+            right = j
+        elif k >= i:
+            left = i
+        else:
+            break
+    return a[k]
+
+
+@njit(cache=True, nogil=True)
+def _quantile(a, n, q):
+    """
+    Linear-interpolated q quantile of a[:n] (np.quantile's default method), reordering a in place.
+    """
+    position = q * (n - 1)
+    lower = int(np.floor(position))
+    if lower >= n - 1:
+        return _select(a, n, n - 1)
+    high_value = _select(a, n, lower + 1)
+    low_value = a[0]
+    for i in range(1, lower + 1):  # Everything before the selected element is smaller
+        if a[i] > low_value:
+            low_value = a[i]
+    return low_value + (high_value - low_value) * (position - lower)
+
+
+@njit(cache=True, nogil=True)
+def _lower_tail_mean(a, n, k):
+    if k <= 0:
+        return 0.0
+    if k < n:
+        _select(a, n, k - 1)
+    total = 0.0
+    for i in range(k):
+        total += a[i]
+    return total / k
+
+
+@njit(cache=True, nogil=True)
+def _fill_normal(out, n, loc, scale, rng, pool_samples, offset):
+    """
+    Write n samples of N(loc, scale) to out, from the pool when offset >= 0, else from rng.
+    """
+    for i in range(n):
+        z = pool_samples[offset + i] if offset >= 0 else rng.standard_normal()
+        out[i] = loc + scale * z
+
+
+@njit(cache=True, nogil=True)
+def risk_kernel(trade_sizes, trade_values, num_simulations, confidence_level, weights,
+                rng, pool_samples, pool_offsets, out):
+    """
+    Fused sampling, tail statistics, normalization, clamping and weighting for each trade.
+
+    Writes monte_carlo, var, cvar, risk_parity and final_risk to the columns
+    of `out` (shape (len(trade_values), 5)). Rows of `pool_offsets` hold one
+    pool offset per simulated model, or -1 to draw from `rng` instead.
+    """
+    alpha = 1 - confidence_level
+    tail_count = int(alpha * num_simulations)
+    scratch = np.empty(num_simulations)
+
+    for t in range(len(trade_values)):
+        value = trade_values[t]
+        monte_carlo = var = cvar = risk_parity = 0.0
+
+        if value > 0 and trade_sizes[t] > 0:
+            mean_return = rng.uniform(-0.05, 0.05)
+            scale = value * rng.uniform(0.05, 0.25)
+            loc = value * mean_return
+            offset = pool_offsets[t, 0]
+            loss_count = 0
+            for i in range(num_simulations):
+                z = pool_samples[offset + i] if offset >= 0 else rng.standard_normal()
+                simulation = loc + scale * z
+                if simulation < 0:
+                    scratch[loss_count] = -simulation  # Loss magnitudes, compacted
+                    loss_count += 1
+            if loss_count == 0:
+                monte_carlo = 0.01
+            else:
+                # 95th percentile of the losses is the 5th percentile of their magnitudes
+                monte_carlo = min(max(_quantile(scratch, loss_count, 0.05) / scale, 0.01), 1.0)
+
+        if value > 0:
+            _fill_normal(scratch, num_simulations, value * 0.01, value * rng.uniform(0.03, 0.07),
+                         rng, pool_samples, pool_offsets[t, 1])
+            var = min(max(abs(_quantile(scratch, num_simulations, alpha)) / value, 0.0), 1.0)
+
+            _fill_normal(scratch, num_simulations, value * 0.01, value * rng.uniform(0.03, 0.07),
+                         rng, pool_samples, pool_offsets[t, 2])
+            cvar = min(max(abs(_lower_tail_mean(scratch, num_simulations, tail_count)) / value, 0.0), 1.0)
+
+            risk_parity = min(max(value * rng.uniform(0.05, 0.15) / (value + 10), 0.0), 1.0)
+
+        combined = (monte_carlo * weights[0] + var * weights[1] +
+                    cvar * weights[2] + risk_parity * weights[3])
+        out[t, 0] = monte_carlo
+        out[t, 1] = var
+        out[t, 2] = cvar
+        out[t, 3] = risk_parity
+        out[t, 4] = min(max(combined, 0.0), 1.0)
@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+
+from random_streams import get_process_rng
+
+DEFAULT_POOL_SIZE = 2 ** 20  # 8 MB of float64 samples
+DEFAULT_REUSE_FACTOR = 16
+POOL_POLICIES = ("reshuffle", "regenerate")
+
+_process_pool = None
+_process_pool_pid = None
+
+
+class StandardNormalPool:
+    """
+    Pre-generated standard-normal samples handed out as (rows, n) blocks.
+
+    Every row of a block is a contiguous window starting at a random offset
+    into the pool, so a draw costs a copy instead of an RNG fill. Once
+    `reuse_factor` times the pool size has been handed out the pool is
+    refreshed according to `policy`:
+
+    - "reshuffle": permute the samples in place.
+    - "regenerate": refill the pool with fresh draws.
+
+    Offsets are random on every draw anyway, so a pool that is never
+    refreshed would keep reusing the same samples; every policy therefore
+    changes the data itself.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, seed=None, policy="regenerate",
+                 reuse_factor=DEFAULT_REUSE_FACTOR, samples=None):
+        if policy not in POOL_POLICIES:
+            raise ValueError(f"Unknown pool policy {policy!r}; expected one of {POOL_POLICIES}")
+        self.rng = np.random.default_rng(seed)  # Accepts an int, SeedSequence or an existing Generator
+        self.policy = policy
+        self.reuse_factor = reuse_factor
+        self.samples = samples if samples is not None else self.rng.standard_normal(size)
+        self.size = len(self.samples)
+        self.refreshes = 0
+        self._handed_out = 0
+
+    @classmethod
+    def load(cls, path, seed=None, policy="reshuffle", reuse_factor=DEFAULT_REUSE_FACTOR):
+        """
+        Memory-map a pool saved with save(); processes loading the same file share its pages
+        until their first refresh, which moves the samples into a private copy.
+        """
+        return cls(seed=seed, policy=policy, reuse_factor=reuse_factor, samples=np.load(path, mmap_mode="r"))
+
+    def save(self, path):
+        np.save(path, np.asarray(self.samples))
+
+    def offsets(self, rows, num_samples):
+        """
+        Start offsets of `rows` windows of num_samples each, applying the refresh policy when due.
+        """
+        if num_samples > self.size:
+            raise ValueError(f"Cannot draw {num_samples} samples per row from a pool of {self.size}")
+        if self._handed_out >= self.reuse_factor * self.size:
+            self.refresh()
+        self._handed_out += rows * num_samples
+        return self.rng.integers(0, self.size - num_samples, size=rows, endpoint=True)
+
+    def draw(self, rows, num_samples):
+        """
+        Return a new (rows, num_samples) array of standard-normal samples from the pool.
+        """
+        offsets = self.offsets(rows, num_samples)
+        windows = np.lib.stride_tricks.sliding_window_view(self.samples, num_samples)
+        return windows[offsets]
+
+    def refresh(self):
+        """
+        Apply the refresh policy now and reset the reuse counter.
+        """
+        if not self.samples.flags.writeable:
+            self.samples = np.array(self.samples)  # Detach from a read-only memory map
+        if self.policy == "reshuffle":
+            self.rng.shuffle(self.samples)
+        else:
+            self.rng.standard_normal(out=self.samples)
+        self.refreshes += 1
+        self._handed_out = 0
+
+
+def get_process_pool():
+    """
+    Per-process pool, created lazily and re-created after a fork so workers never share offsets.
+    """
+    global _process_pool, _process_pool_pid
+    if _process_pool is None or _process_pool_pid != os.getpid():
+        _process_pool = StandardNormalPool(seed=get_process_rng())
+        _process_pool_pid = os.getpid()
+    return _process_pool
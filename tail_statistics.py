@@ -0,0 +1,89 @@
+import numpy as np
+
+# Tail statistics computed with partition-based selection along the last axis.
+#
+# Every function here reorders its input in place (np.partition semantics),
+# which is what lets them run in O(n) per row without copying the samples.
+# Pass a copy if the original order still matters to the caller.
+
+
+def _positions(q, n):
+    """
+    Lower/upper order-statistic indices and weight for the linear-interpolated q quantile of n values.
+    """
+    position = q * (n - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, n - 1)
+    return lower, upper, position - lower
+
+
+def smallest_sorted(a, k):
+    """
+    Move the k smallest values of each row to the front, ascending, and return that view.
+    """
+    n = a.shape[-1]
+    k = min(max(int(k), 1), n)
+    if k < n:
+        a.partition(k - 1, axis=-1)
+    head = a[..., :k]
+    head.sort(axis=-1)
+    return head
+
+
+def quantile(a, q):
+    """
+    Linear-interpolated q quantile of each row, matching np.quantile's default method.
+    """
+    n = a.shape[-1]
+    lower, upper, weight = _positions(q, n)
+    a.partition(sorted({lower, upper}), axis=-1)
+    low_value = a[..., lower]
+    return low_value + (a[..., upper] - low_value) * weight
+
+
+def order_statistics(a, ks):
+    """
+    The ks-th smallest values of each row, shaped (..., len(ks)).
+    """
+    ks = [int(k) for k in ks]
+    a.partition(sorted(set(ks)), axis=-1)
+    return a[..., ks]
+
+
+def lower_tail_mean(a, k):
+    """
+    Mean of the k smallest values of each row (zero when k is 0).
+    """
+    k = min(int(k), a.shape[-1])
+    if k <= 0:
+        return np.zeros(a.shape[:-1])
+    if k < a.shape[-1]:
+        a.partition(k - 1, axis=-1)
+    return a[..., :k].mean(axis=-1)
+
+
+def ragged_quantile(a, q, counts):
+    """
+    Linear-interpolated q quantile over the first counts[i] smallest values of row i.
+
+    `a` is 2-D and every value that does not belong to a row's sample must be
+    +inf, so it sorts behind the valid ones. Rows with a count of 0 yield NaN.
+    Only the leading max-position columns are ever sorted, which keeps
+    low quantiles (the tail) cheap.
+    """
+    counts = np.asarray(counts)
+    last = np.maximum(counts - 1, 0)
+    position = q * last
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, last)
+
+    head = smallest_sorted(a, int(upper.max(initial=0)) + 1)
+    low_value = np.take_along_axis(head, lower[:, None], axis=1)[:, 0]
+    high_value = np.take_along_axis(head, upper[:, None], axis=1)[:, 0]
+
+    # Empty rows only hold +inf; leaving them out avoids inf - inf
+    result = np.full(len(counts), np.nan)
+    valid = counts > 0
+    low_value, high_value = low_value[valid], high_value[valid]
+    result[valid] = low_value + (high_value - low_value) * (position - lower)[valid]
+    return result
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+from tail_statistics import quantile
+
+DEFAULT_SKETCH_BINS = 2 ** 16  # 512 KB of counts, error bound ~1.5e-5
+
+# Quantiles of "Final Risk" that separate the Low / Medium / High levels
+THRESHOLD_QUANTILES = {"Low": 0.3, "Medium": 0.7}
+
+
+def thresholds_from_values(values):
+    """
+    Exact risk thresholds from an array of final risks; `values` is reordered in place.
+    """
+    thresholds = {name: quantile(values, q) for name, q in THRESHOLD_QUANTILES.items()}
+    thresholds["High"] = values.max()
+    return thresholds
+
+
+class RiskQuantileSketch:
+    """
+    Mergeable, constant-memory quantile sketch for final risks in [0, 1].
+
+    A fixed-bin histogram over the clamped [0, 1] range plus exact count,
+    minimum and maximum. Sketches built on separate workers combine with
+    merge() into exactly the sketch of the concatenated data.
+
+    Error bound: quantile(q) lies in the same bin as the exact order
+    statistic at rank floor(q * (count - 1)), so it differs from it by at
+    most one bin width, 1 / bins. np.quantile interpolates between that
+    order statistic and the next one, which adds at most their gap
+    (vanishingly small for training-sized samples).
+    """
+
+    def __init__(self, bins=DEFAULT_SKETCH_BINS):
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.count = 0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        indices = np.clip((values * self.bins).astype(np.int64), 0, self.bins - 1)
+        self.counts += np.bincount(indices, minlength=self.bins)
+        self.count += len(values)
+
+    def __getstate__(self):
+        # Pickle only the occupied bins: risks cluster in a narrow band, so
+        # sketches sent between processes shrink from 512 KB to a few KB
+        occupied = np.flatnonzero(self.counts)
+        state = dict(self.__dict__)
+        state["counts"] = (occupied.astype(np.int32), self.counts[occupied])
+        return state
+
+    def __setstate__(self, state):
+        occupied, counts = state["counts"]
+        state["counts"] = np.zeros(state["bins"], dtype=np.int64)
+        state["counts"][occupied] = counts
+        self.__dict__.update(state)
+
+    def save(self, path, **extra):
+        """
+        Write the sketch, plus any `extra` arrays, to an .npz file; replaces `path` atomically.
+        """
+        occupied = np.flatnonzero(self.counts)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, bins=self.bins, occupied=occupied, occupied_counts=self.counts[occupied],
+                     count=self.count, minimum=self.minimum, maximum=self.maximum, **extra)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            sketch = cls(int(data["bins"]))
+            sketch.counts[data["occupied"]] = data["occupied_counts"]
+            sketch.count = int(data["count"])
+            sketch.minimum = float(data["minimum"])
+            sketch.maximum = float(data["maximum"])
+        return sketch
+
+    def merge(self, other):
+        if other.bins != self.bins:
+            raise ValueError(f"Cannot merge sketches with {other.bins} and {self.bins} bins")
+        self.counts += other.counts
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def quantile(self, q):
+        if self.count == 0:
+            raise ValueError("Cannot take a quantile of an empty sketch")
+        rank = int(np.floor(q * (self.count - 1)))
+        cumulative = np.cumsum(self.counts)
+        index = int(np.searchsorted(cumulative, rank, side="right"))
+        before = cumulative[index - 1] if index > 0 else 0
+        # Spread the bin's values evenly across its width
+        fraction = (rank - before + 0.5) / self.counts[index]
+        estimate = (index + fraction) / self.bins
+        return min(max(estimate, self.minimum), self.maximum)
+
+    def thresholds(self):
+        if self.count == 0:
+            raise ValueError("No training data to derive thresholds from")
+        thresholds = {name: self.quantile(q) for name, q in THRESHOLD_QUANTILES.items()}
+        thresholds["High"] = self.maximum
+        return thresholds
@@ -0,0 +1,76 @@
+import json
+import os
+
+import numpy as np
+
+# Written by training, read by RA.py
+THRESHOLDS_FILE = "risk_thresholds.json"
+
+# Used until a training run has produced risk_thresholds.json
+DEFAULT_THRESHOLDS = {"Low": 0.08, "Medium": 0.12, "High": float("inf")}
+
+RISK_LEVELS = ("Low", "Medium", "High")
+RISK_COLORS = {"Low": "green", "Medium": "orange", "High": "red"}
+
+
+class ThresholdStore:
+    """
+    Risk thresholds loaded once and reloaded only when the file changes.
+
+    refresh() compares the file's modification time and size with the last
+    load, so polling it is a single os.stat. A missing file means the
+    defaults; a file that cannot be parsed (e.g. mid-write) keeps the
+    previous thresholds until the next refresh. `version` increases on
+    every change.
+    """
+
+    def __init__(self, path=THRESHOLDS_FILE, defaults=DEFAULT_THRESHOLDS):
+        self.path = path
+        self.defaults = dict(defaults)
+        self.thresholds = dict(defaults)
+        self.version = 0
+        self._signature = None
+        self._boundaries = np.array([defaults["Low"], defaults["Medium"]])
+        self.refresh()
+
+    def refresh(self):
+        """
+        Reload the thresholds if the file changed; returns True when they did.
+        """
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._signature:
+            return False
+
+        if signature is None:
+            thresholds = dict(self.defaults)
+        else:
+            try:
+                with open(self.path, "r") as file:
+                    thresholds = {**self.defaults, **json.load(file)}
+            except (OSError, ValueError) as e:
+                print(f"Error loading thresholds: {e}")
+                return False
+        self._signature = signature
+        if thresholds == self.thresholds:
+            return False
+        self.thresholds = thresholds
+        self._boundaries = np.array([thresholds["Low"], thresholds["Medium"]], dtype=float)
+        self.version += 1
+        return True
+
+    def classify(self, risks):
+        """
+        Risk level index (0 Low, 1 Medium, 2 High) of every value in `risks`.
+        """
+        # side="right": a risk equal to a boundary belongs to the level above it
+        return np.searchsorted(self._boundaries, np.asarray(risks, dtype=float), side="right")
+
+    def levels(self, risks):
+        """
+        Risk level names of a whole column of final risks.
+        """
+        return np.array(RISK_LEVELS)[self.classify(risks)]
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from trade_journal import TRADE_COLUMNS
+
+TEXT_COLUMNS = ("Date", "Ticker")
+DEFAULT_CAPACITY = 1024
+
+
+class TradeBuffer:
+    """
+    Growable columnar trade store: one preallocated NumPy array per column.
+
+    append() writes into the spare capacity and doubles it when full, so a
+    session of n submissions costs O(n) copying in total instead of the
+    O(n^2) of concatenating DataFrames. frame() wraps the filled part of the
+    arrays in a DataFrame without copying them; rows past the current length
+    are never visible, so later appends do not disturb a frame already handed out.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.size = 0
+        self.columns = {
+            column: np.empty(capacity, dtype=object if column in TEXT_COLUMNS else np.float64)
+            for column in TRADE_COLUMNS
+        }
+        self._frame = None
+
+    @classmethod
+    def from_frame(cls, trades):
+        buffer = cls(capacity=max(DEFAULT_CAPACITY, 2 * len(trades)))
+        for column, values in buffer.columns.items():
+            values[:len(trades)] = trades[column].to_numpy(dtype=values.dtype)
+        buffer.size = len(trades)
+        return buffer
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def empty(self):
+        return self.size == 0
+
+    @property
+    def capacity(self):
+        return len(self.columns["Date"])
+
+    def _grow(self):
+        capacity = 2 * self.capacity
+        for column, values in self.columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self.columns[column] = grown
+
+    def append(self, trade):
+        """
+        Add one trade (a mapping keyed by TRADE_COLUMNS) in amortized O(1).
+        """
+        if self.size == self.capacity:
+            self._grow()
+        for column, values in self.columns.items():
+            values[self.size] = trade[column]
+        self.size += 1
+        self._frame = None
+
+    def frame(self):
+        """
+        DataFrame over the current trades, sharing the buffer's memory; cached until the next append.
+        """
+        if self._frame is None:
+            # Explicit Series keep the text columns as object arrays instead of converting (copying) them
+            self._frame = pd.DataFrame(
+                {column: pd.Series(values[:self.size], dtype=values.dtype, copy=False)
+                 for column, values in self.columns.items()},
+                copy=False,
+            )
+        return self._frame
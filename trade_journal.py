@@ -0,0 +1,140 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+JOURNAL_FILE = "trade_journal.db"
+
+# Trade DataFrame column -> journal table column
+JOURNAL_COLUMNS = {
+    "Date": "date",
+    "Ticker": "ticker",
+    "Trade Size": "trade_size",
+    "Trade Value": "trade_value",
+    "Monte Carlo Risk": "monte_carlo",
+    "VaR": "var",
+    "CVaR": "cvar",
+    "Risk Parity": "risk_parity",
+    "Final Risk Factor": "final_risk",
+}
+TRADE_COLUMNS = list(JOURNAL_COLUMNS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    date TEXT,
+    ticker TEXT COLLATE NOCASE,
+    trade_size REAL,
+    trade_value REAL,
+    monte_carlo REAL,
+    var REAL,
+    cvar REAL,
+    risk_parity REAL,
+    final_risk REAL
+);
+CREATE INDEX IF NOT EXISTS trades_date ON trades (date);
+CREATE INDEX IF NOT EXISTS trades_ticker_date ON trades (ticker, date);
+"""
+
+
+def format_journal_date(date):
+    """
+    Dates are stored as YYYY-MM-DD text, so they sort and range-query correctly.
+    """
+    if date is None or date is pd.NaT:
+        return None
+    try:
+        return pd.Timestamp(date).strftime('%Y-%m-%d')
+    except (ValueError, TypeError):
+        return str(date)
+
+
+class TradeJournal:
+    """
+    Append-only trade journal in SQLite.
+
+    The database runs in WAL mode, so every append is one small durable
+    write instead of a rewrite of the whole history, and a crash loses at
+    most the trade being written. Trades are indexed by date and by
+    (ticker, date) so positions() can filter the history without scanning it.
+    """
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")  # Durable across app crashes; WAL keeps it consistent
+        self.connection.executescript(_SCHEMA)
+
+    def _row(self, trade):
+        # sqlite3 would store NumPy integers as raw bytes, so hand it plain Python scalars
+        row = [trade[column].item() if isinstance(trade[column], np.generic) else trade[column]
+               for column in TRADE_COLUMNS]
+        row[0] = format_journal_date(row[0])
+        return row
+
+    def append(self, trade):
+        """
+        Store one trade (a mapping keyed by TRADE_COLUMNS) and commit it immediately.
+        """
+        self.append_many([trade])
+
+    def append_many(self, trades):
+        placeholders = ", ".join("?" * len(JOURNAL_COLUMNS))
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO trades ({', '.join(JOURNAL_COLUMNS.values())}) VALUES ({placeholders})",
+                (self._row(trade) for trade in trades),
+            )
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+
+    def load(self):
+        """
+        All trades in entry order as a DataFrame.
+        """
+        columns = ", ".join(f'{column} AS "{name}"' for name, column in JOURNAL_COLUMNS.items())
+        return pd.read_sql_query(f"SELECT {columns} FROM trades ORDER BY id", self.connection)
+
+    def positions(self, ticker=None, start=None, end=None):
+        """
+        Positions in load()'s order of the trades whose ticker starts with `ticker` (any case)
+        and whose date lies in the inclusive range [start, end].
+
+        Trades are never deleted, so ids run 1..n in entry order and id - 1 is the position.
+        """
+        conditions, params = [], []
+        if ticker:
+            # A prefix LIKE on the NOCASE ticker column can use the (ticker, date) index
+            escaped = ticker.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            conditions.append("ticker LIKE ? ESCAPE '\\'")
+            params.append(escaped + "%")
+        if start is not None:
+            conditions.append("date >= ?")
+            params.append(format_journal_date(start))
+        if end is not None:
+            conditions.append("date <= ?")
+            params.append(format_journal_date(end))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        ids = self.connection.execute(f"SELECT id FROM trades{where} ORDER BY id", params).fetchall()
+        return np.array([row[0] for row in ids], dtype=np.int64) - 1
+
+    def import_json(self, path):
+        """
+        One-time migration from the old trade_data.json; does nothing once the journal holds trades.
+        Returns the number of trades imported.
+        """
+        if not os.path.exists(path) or self.count():
+            return 0
+        trades = pd.read_json(path)
+        for column in TRADE_COLUMNS:
+            if column not in trades.columns:
+                trades[column] = None
+        trades = trades[TRADE_COLUMNS].astype(object).where(trades[TRADE_COLUMNS].notna(), None)
+        self.append_many(trades.to_dict("records"))
+        return len(trades)
+
+    def close(self):
+        self.connection.close()
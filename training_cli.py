@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+
+import numpy as np
+
+from risk_calculations import RISK_ENGINES
+from training_core import (
+    CHECKPOINT_FILE,
+    DEFAULT_ITERATIONS,
+    DEFAULT_SIZE_RANGE,
+    DEFAULT_VALUE_RANGE,
+    THRESHOLDS_FILE,
+    TRAINING_BACKENDS,
+    abort_event,
+    calibration_key,
+    checkpoint_data_count,
+    generate_training_data,
+    get_backend,
+    load_calibration,
+    load_threshold_sketch,
+    save_calibration,
+    write_thresholds,
+)
+from training_progress import TrainingProgress
+from training_storage import TRAINING_DATA_FORMATS, open_training_sink
+
+# Headless training: no Tkinter. Progress goes to stdout as
+# one JSON object per line ("start", "progress", then "done" or "aborted"), so
+# cron jobs and schedulers can follow a run and ship risk_thresholds.json.
+
+
+def emit(event, stream=None, **fields):
+    """
+    Print one JSON-lines event.
+    """
+    stream = stream or sys.stdout
+    stream.write(json.dumps({"event": event, "time": time.time(), **fields}) + "\n")
+    stream.flush()
+
+
+def _progress_event(snapshot):
+    emit(
+        "progress",
+        completed=snapshot["completed"],
+        total=snapshot["total"],
+        fraction=round(snapshot["fraction"], 6),
+        trades_per_second=round(snapshot["trades_per_second"], 1),
+        eta_seconds=None if snapshot["eta_seconds"] is None else round(snapshot["eta_seconds"], 1),
+        workers=len(snapshot["worker_trades_per_second"]),
+    )
+
+
+def run_training(iterations=DEFAULT_ITERATIONS, size_range=DEFAULT_SIZE_RANGE, value_range=DEFAULT_VALUE_RANGE,
+                 backend="process", num_workers=None, engine="numpy", engine_options=None, seed=None,
+                 output=THRESHOLDS_FILE, training_data=None, dtype=np.float64, progress_interval=5.0,
+                 backend_options=None, checkpoint=CHECKPOINT_FILE, resume=False, refine=False,
+                 abort_event=abort_event, progress=None, on_task=None, on_event=emit):
+    """
+    Run one training and write its thresholds to `output`, reporting JSON-lines events on stdout.
+
+    `training_data`, when given, also stores the raw final risks there. The
+    run is checkpointed to `checkpoint` (None disables it); `resume` continues
+    from an existing checkpoint instead of starting over, and `refine` adds
+    the new iterations to the sketch saved with `output` by an earlier run.
+    Setting `abort_event` stops the run; it is cleared on entry, so an earlier
+    aborted run does not stop this one. Returns the thresholds, or None if
+    the run was aborted.
+
+    Front-ends can pass their own TrainingProgress `progress`, an
+    `on_task(index, count, seconds)` callback and an `on_event(event, **fields)`
+    reporter in place of the JSON-lines one. `backend` may be a
+    TRAINING_BACKENDS name or a TrainingBackend instance.
+    """
+    abort_event.clear()
+    if isinstance(backend, str):
+        backend = get_backend(backend, num_workers=num_workers, **(backend_options or {}))
+    if checkpoint is not None and not resume and os.path.exists(checkpoint):
+        os.remove(checkpoint)  # A fresh run must not pick up an old one's state
+    resume_count = checkpoint_data_count(checkpoint) if checkpoint is not None else None
+    if seed is None and resume_count is None:
+        seed = np.random.SeedSequence().entropy  # Otherwise the checkpoint's seed is reused
+    sketch = load_threshold_sketch(output) if refine else None
+    run_key = calibration_key(backend.name, engine, backend.num_workers, engine_options)
+    if progress is None:
+        progress = TrainingProgress(iterations, on_update=_progress_event, interval=progress_interval,
+                                    expected_rate=load_calibration(run_key))
+    on_event("start", iterations=iterations, size_range=list(size_range), value_range=list(value_range),
+             backend=backend.name, workers=backend.num_workers, engine=engine, seed=seed,
+             resumed=resume_count is not None, refined_from=sketch.count if sketch is not None else None)
+
+    start = time.perf_counter()
+    options = dict(engine=engine, seed=seed, engine_options=engine_options, sketch=sketch, progress=progress,
+                   checkpoint=checkpoint, abort_event=abort_event, on_task=on_task)
+    if training_data is not None:
+        with open_training_sink(training_data, dtype, resume_count) as sink:
+            sketch = generate_training_data(iterations, size_range, value_range, backend, sink=sink, **options)
+    else:
+        sketch = generate_training_data(iterations, size_range, value_range, backend, **options)
+    elapsed = time.perf_counter() - start
+    # Trades evaluated by this run; the sketch also holds checkpointed (--resume) and refined (--refine) ones
+    run_count = progress.snapshot()["completed"] - progress.skipped
+
+    if abort_event.is_set():
+        on_event("aborted", completed=run_count, sketch_count=sketch.count, seconds=round(elapsed, 3),
+                 checkpoint=checkpoint)
+        return None
+
+    thresholds = write_thresholds(sketch.thresholds(), output, sketch)
+    trades_per_second = sum(progress.snapshot()["worker_trades_per_second"].values())
+    save_calibration(run_key, trades_per_second)
+    on_event("done", completed=run_count, sketch_count=sketch.count, seconds=round(elapsed, 3),
+             trades_per_second=round(run_count / elapsed, 1) if elapsed > 0 else None,
+             thresholds=thresholds, output=output, training_data=training_data)
+    return thresholds
+
+
+def add_training_arguments(parser, training_data=None):
+    """
+    Arguments shared by the headless CLI and the Tkinter training mode.
+    """
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Simulated trades to evaluate")
+    parser.add_argument("--size-range", type=int, nargs=2, default=DEFAULT_SIZE_RANGE, metavar=("MIN", "MAX"),
+                        help="Range of simulated trade sizes")
+    parser.add_argument("--value-range", type=int, nargs=2, default=DEFAULT_VALUE_RANGE, metavar=("MIN", "MAX"),
+                        help="Range of simulated trade values")
+    parser.add_argument("--backend", choices=sorted(TRAINING_BACKENDS), default="process",
+                        help="Where the training tasks run: serial, a thread or process pool, or a Dask cluster")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker threads/processes (default: one per CPU core)")
+    parser.add_argument("--scheduler", default=None, help="Address of an existing Dask scheduler (dask backend only)")
+    parser.add_argument("--engine", choices=sorted(RISK_ENGINES), default="numpy",
+                        help="Risk engine used to evaluate the simulated trades")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Standard-error target for the adaptive engine (normalized risk units)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the training RNG streams; the same seed reproduces a run exactly")
+    parser.add_argument("--output", default=THRESHOLDS_FILE, help="Where to write the thresholds JSON")
+    parser.add_argument("--training-data", default=training_data,
+                        help=f"Also store the raw final risks; the extension ({', '.join(TRAINING_DATA_FORMATS)}) "
+                             f"picks the format")
+    parser.add_argument("--float32", action="store_true", help="Store the training data as float32")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="Where to checkpoint the run")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Do not checkpoint the run")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the run saved in the checkpoint (same parameters; --seed may be omitted)")
+    parser.add_argument("--refine", action="store_true",
+                        help="Add the iterations to the thresholds already in --output instead of starting over")
+    return parser
+
+
+def check_training_arguments(parser, args):
+    """
+    Reject combinations of the shared training arguments that cannot run.
+    """
+    if args.iterations <= 0:
+        parser.error("--iterations must be positive")
+    for name, (low, high) in (("--size-range", args.size_range), ("--value-range", args.value_range)):
+        if low > high:
+            parser.error(f"{name} MIN must not exceed MAX")
+    if args.tolerance is not None and args.engine != "adaptive":
+        parser.error("--tolerance only applies to --engine adaptive")
+    if args.scheduler is not None and args.backend != "dask":
+        parser.error("--scheduler only applies to --backend dask")
+    if args.resume and args.no_checkpoint:
+        parser.error("--resume needs a checkpoint")
+
+
+def training_options(args):
+    """
+    run_training keyword arguments for parsed training arguments.
+    """
+    return dict(
+        iterations=args.iterations,
+        size_range=tuple(args.size_range),
+        value_range=tuple(args.value_range),
+        backend=args.backend,
+        num_workers=args.workers,
+        engine=args.engine,
+        engine_options={"tolerance": args.tolerance} if args.tolerance is not None else None,
+        seed=args.seed,
+        output=args.output,
+        training_data=args.training_data,
+        dtype=np.float32 if args.float32 else np.float64,
+        backend_options={"scheduler_address": args.scheduler} if args.scheduler is not None else None,
+        checkpoint=None if args.no_checkpoint else args.checkpoint,
+        resume=args.resume,
+        refine=args.refine,
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Risk Assessment PRO headless training")
+    add_training_arguments(parser)
+    parser.add_argument("--progress-interval", type=float, default=5.0,
+                        help="Seconds between progress events")
+    args = parser.parse_args(argv)
+    check_training_arguments(parser, args)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Ctrl+C / SIGTERM stop the workers at their next chunk instead of killing the run mid-write
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: abort_event.set())
+
+    thresholds = run_training(progress_interval=args.progress_interval, **training_options(args))
+    return 0 if thresholds is not None else 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
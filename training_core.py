@@ -0,0 +1,520 @@
+import json
+import os
+import platform
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from multiprocessing import cpu_count, Event, Pool, Queue, TimeoutError
+from queue import Empty
+
+import numpy as np
+
+from risk_calculations import get_engine
+from sample_pool import StandardNormalPool
+from random_streams import spawn_seeds
+from threshold_stats import RiskQuantileSketch
+from threshold_store import THRESHOLDS_FILE
+from training_progress import TrainingProgress
+
+# Training data generation shared by every front-end: the simulated trades
+# are split into tasks, an execution backend runs them, and the parent merges
+# their quantile sketches (and optionally streams their raw values to a sink).
+
+# Set to abort training; shared with the workers, which check it before every chunk
+abort_event = Event()
+
+# Seconds to wait for aborted workers to hand in their partial sketches before terminating them
+ABORT_GRACE_PERIOD = 1.0
+
+# Trades evaluated per vectorized engine call inside a task; also bounds how
+# long a worker takes to notice an abort (well under a second per chunk on one core)
+BATCH_CHUNK_SIZE = 1024
+
+# Trades per task; small enough to balance load across busy or uneven workers
+TASK_SIZE = 32768
+
+# Resumable training state, and seconds between checkpoints during a run
+CHECKPOINT_FILE = "training_checkpoint.npz"
+CHECKPOINT_INTERVAL = 60.0
+
+# Cached throughput calibrations, keyed by machine, backend, engine and worker count
+CALIBRATION_FILE = "training_calibration.json"
+CALIBRATION_CHUNKS = 3  # Chunks per calibration task
+CALIBRATION_TASKS = 2  # Calibration tasks per worker; the first one pays for start-up and JIT compilation
+
+# Default training run: simulated trades and the ranges their sizes and values are drawn from
+DEFAULT_ITERATIONS = 24331296
+DEFAULT_SIZE_RANGE = (1, 1000)
+DEFAULT_VALUE_RANGE = (1, 50000)
+
+TRAINING_BACKENDS = {}
+
+
+def register_backend(name):
+    def decorator(cls):
+        cls.name = name
+        TRAINING_BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def get_backend(name="process", **options):
+    """
+    Instantiate the training backend registered under `name`.
+    """
+    try:
+        backend_class = TRAINING_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown training backend {name!r}; expected one of {sorted(TRAINING_BACKENDS)}")
+    return backend_class(**options)
+
+
+def iter_training_chunks(num_iterations, size_range, value_range, engine="numpy", seed=None, engine_options=None,
+                         should_stop=None):
+    """
+    Yield the final risks of `num_iterations` simulated trades as arrays of up to BATCH_CHUNK_SIZE.
+    `engine` names a risk_calculations.RISK_ENGINES entry (built with `engine_options`); `seed`
+    (usually a SeedSequence spawned by the parent) makes the stream reproducible. The stream
+    ends early once `should_stop()` returns True.
+    """
+    risk_engine = get_engine(engine, **(engine_options or {}))
+    rng = np.random.default_rng(seed)
+    pool = StandardNormalPool(seed=rng)
+    for start in range(0, num_iterations, BATCH_CHUNK_SIZE):
+        if should_stop is not None and should_stop():
+            break
+        count = min(BATCH_CHUNK_SIZE, num_iterations - start)
+        trade_sizes = rng.integers(size_range[0], size_range[1], size=count, endpoint=True)
+        trade_values = rng.integers(value_range[0], value_range[1], size=count, endpoint=True)
+
+        risks = risk_engine.evaluate(trade_sizes, trade_values, rng=rng, pool=pool)
+        yield risks["final_risk"]
+
+
+def split_training_tasks(total_iterations, task_size=TASK_SIZE):
+    """
+    Iteration counts of the training tasks: full `task_size` tasks plus the remainder.
+    """
+    full_tasks, remainder = divmod(total_iterations, task_size)
+    return [task_size] * full_tasks + ([remainder] if remainder else [])
+
+
+def run_training_task(task, should_stop=None, report=None):
+    """
+    Evaluate one training task and summarize it in a quantile sketch.
+
+    `task` is (index, num_iterations, size_range, value_range, engine, seed,
+    engine_options, keep_values). `report(count, seconds)` is called after
+    every chunk. Returns (index, sketch, values, seconds), where values is
+    the raw final-risk array when keep_values is set, else None.
+    """
+    index, num_iterations, size_range, value_range, engine, seed, engine_options, keep_values = task
+    start = chunk_start = time.perf_counter()
+    sketch = RiskQuantileSketch()
+    chunks = []
+    for chunk in iter_training_chunks(num_iterations, size_range, value_range, engine, seed, engine_options,
+                                      should_stop):
+        sketch.update(chunk)
+        if keep_values:
+            chunks.append(chunk)
+        if report is not None:
+            now = time.perf_counter()
+            report(len(chunk), now - chunk_start)
+            chunk_start = now
+    values = np.concatenate(chunks) if chunks else None
+    return index, sketch, values, time.perf_counter() - start
+
+
+class TrainingBackend:
+    """
+    Runs training tasks and yields their results in completion order.
+
+    Subclasses implement run(tasks, abort_event, progress). They must stop
+    handing out work once `abort_event` is set and report every finished
+    chunk to `progress` (a TrainingProgress, or None).
+    """
+
+    name = None
+
+    def __init__(self, num_workers=None):
+        self.num_workers = num_workers or cpu_count()
+
+    def run(self, tasks, abort_event, progress):
+        raise NotImplementedError
+
+
+@register_backend("serial")
+class SerialBackend(TrainingBackend):
+    """
+    Everything in the calling thread; the reference for the other backends and for profiling.
+    """
+
+    def __init__(self, num_workers=None):
+        super().__init__(1)
+
+    def run(self, tasks, abort_event, progress):
+        report = None if progress is None else lambda count, seconds: progress.update("main", count, seconds)
+        for task in tasks:
+            yield run_training_task(task, abort_event.is_set, report)
+
+
+@register_backend("thread")
+class ThreadBackend(TrainingBackend):
+    """
+    A thread pool in this process; scales with engines that release the GIL (numba, large NumPy kernels).
+    """
+
+    def run(self, tasks, abort_event, progress):
+        def run_task(task):
+            worker = threading.current_thread().name
+            report = None if progress is None else lambda count, seconds: progress.update(worker, count, seconds)
+            return run_training_task(task, abort_event.is_set, report)
+
+        with ThreadPoolExecutor(self.num_workers, thread_name_prefix="training") as executor:
+            pending = {executor.submit(run_task, task) for task in tasks}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+
+# The pool workers' view of abort_event, and the queue they report finished chunks on (set by _init_worker)
+_abort_event = abort_event
+_progress_queue = None
+
+
+def _init_worker(worker_abort_event, progress_queue):
+    global _abort_event, _progress_queue
+    # Interrupts are the parent's to handle (it sets the abort event); terminate() must still kill
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _abort_event = worker_abort_event
+    _progress_queue = progress_queue
+
+
+def _report_to_queue(count, seconds):
+    _progress_queue.put((os.getpid(), count, seconds))
+
+
+def _run_pool_task(task):
+    return run_training_task(task, _abort_event.is_set, _report_to_queue if _progress_queue is not None else None)
+
+
+@register_backend("process")
+class ProcessBackend(TrainingBackend):
+    """
+    A multiprocessing Pool serving the tasks through imap_unordered.
+
+    Workers report finished chunks on a queue the parent drains while it
+    waits. After an abort, workers that miss ABORT_GRACE_PERIOD are terminated.
+    """
+
+    def run(self, tasks, abort_event, progress):
+        progress_queue = Queue() if progress is not None else None
+
+        def drain_progress():
+            while progress_queue is not None:
+                try:
+                    progress.update(*progress_queue.get_nowait())
+                except Empty:
+                    break
+
+        with Pool(self.num_workers, initializer=_init_worker, initargs=(abort_event, progress_queue)) as pool:
+            results = pool.imap_unordered(_run_pool_task, tasks)
+            finished = 0
+            deadline = None
+            while finished < len(tasks):
+                drain_progress()
+                if deadline is None and abort_event.is_set():
+                    deadline = time.monotonic() + ABORT_GRACE_PERIOD
+                if deadline is not None and time.monotonic() > deadline:
+                    pool.terminate()  # Workers that missed the grace period
+                    break
+                try:
+                    result = results.next(timeout=0.1)
+                except TimeoutError:
+                    continue
+                finished += 1
+                yield result
+            drain_progress()
+
+
+@register_backend("dask")
+class DaskBackend(TrainingBackend):
+    """
+    Tasks mapped over a Dask cluster (requires dask.distributed).
+
+    Uses the scheduler at `scheduler_address`, or a LocalCluster of
+    `num_workers` processes that is reused across runs. Results come back in
+    memory; an abort is relayed to the tasks through a cluster-wide Event.
+    """
+
+    def __init__(self, num_workers=None, scheduler_address=None):
+        super().__init__(num_workers)
+        self.scheduler_address = scheduler_address
+
+    def run(self, tasks, abort_event, progress):
+        from dask.distributed import Event as DaskEvent, as_completed
+        from dask_tasks import ABORT_EVENT_NAME, get_dask_client, run_training_task_dask
+
+        client = get_dask_client(self.scheduler_address, self.num_workers)
+        cluster_abort = DaskEvent(ABORT_EVENT_NAME, client=client)
+        cluster_abort.clear()
+        futures = client.map(run_training_task_dask, tasks, pure=False)
+        all_done = threading.Event()
+
+        def forward_abort():
+            # Relay a local abort to the tasks, which poll the cluster-wide Event
+            while not all_done.is_set():
+                if abort_event.wait(0.2):
+                    cluster_abort.set()
+                    return
+
+        threading.Thread(target=forward_abort, daemon=True).start()
+        try:
+            for future in as_completed(futures):
+                result, worker = future.result()
+                future.release()  # Free the result on the cluster once it is handed on
+                if progress is not None:
+                    progress.update(worker, result[1].count, result[3])
+                yield result
+        finally:
+            all_done.set()
+
+
+def save_checkpoint(path, sketch, completed, run_info, data_count=0):
+    """
+    Persist a run's progress: its sketch, the indices of its completed tasks,
+    the parameters that define it and how many raw values its sink holds.
+    """
+    sketch.save(path, completed=np.array(sorted(completed), dtype=np.int64),
+                run_info=json.dumps(run_info), data_count=data_count)
+
+
+def load_checkpoint(path):
+    """
+    (sketch, completed task indices, run parameters, sink value count) saved by save_checkpoint.
+    """
+    sketch = RiskQuantileSketch.load(path)
+    with np.load(path) as data:
+        return sketch, set(data["completed"].tolist()), json.loads(str(data["run_info"])), int(data["data_count"])
+
+
+def checkpoint_data_count(path):
+    """
+    Raw values a resumable run's sink should keep, or None when there is no checkpoint at `path`.
+    """
+    return load_checkpoint(path)[3] if os.path.exists(path) else None
+
+
+def generate_training_data(total_iterations, size_range, value_range, backend="process", num_workers=None,
+                           engine="numpy", seed=None, engine_options=None, sketch=None, sink=None,
+                           abort_event=abort_event, task_size=TASK_SIZE, on_task=None, progress=None,
+                           backend_options=None, checkpoint=None, checkpoint_interval=CHECKPOINT_INTERVAL):
+    """
+    Generates training data with an execution backend and summarizes it in a quantile sketch.
+
+    `total_iterations` is split into tasks of `task_size` trades, so fast
+    workers pick up more tasks than slow ones and exactly `total_iterations`
+    trades are evaluated. `backend` is a TRAINING_BACKENDS name (built with
+    `num_workers` and `backend_options`) or a TrainingBackend instance. Each
+    task's RiskQuantileSketch is merged into `sketch` (a new one by default);
+    raw values are only collected when an append-only `sink` is given, and
+    arrive in completion order. Task i always gets the i-th RNG stream
+    spawned from `seed`, so the same seed reproduces the run on any backend
+    and worker count.
+
+    `on_task(index, count, seconds)` is called as each task completes, and a
+    TrainingProgress `progress` receives every finished chunk. Setting
+    `abort_event` (the module's by default) stops every worker at its next
+    chunk; the sketch then holds the partial results. Returns the sketch.
+
+    With a `checkpoint` path the run is saved there every
+    `checkpoint_interval` seconds and when it stops early, and an existing
+    checkpoint for the same parameters is resumed: its sketch replaces
+    `sketch`, its completed tasks are skipped, and a missing `seed` is taken
+    from it. Tasks cut short by an abort are then dropped instead of merged,
+    so a resumed run still evaluates every trade exactly once. The
+    checkpoint is removed once all tasks are done. A resumed `sink` must be
+    opened with resume_count=checkpoint_data_count(checkpoint), which checks
+    its file; the checkpoint records the sink's path and dtype, so resuming
+    into a different file or dtype is refused.
+    """
+    if isinstance(backend, str):
+        backend = get_backend(backend, num_workers=num_workers, **(backend_options or {}))
+    if sketch is None:
+        sketch = RiskQuantileSketch()
+
+    task_counts = split_training_tasks(total_iterations, task_size)
+    completed = set()
+    if checkpoint is not None:
+        saved = load_checkpoint(checkpoint) if os.path.exists(checkpoint) else None
+        if seed is None:
+            seed = saved[2]["seed"] if saved else np.random.SeedSequence().entropy
+        run_info = {
+            "total_iterations": total_iterations, "task_size": task_size, "seed": seed,
+            "size_range": list(size_range), "value_range": list(value_range),
+            "engine": engine, "engine_options": engine_options,
+            "training_data": {"path": sink.path, "dtype": sink.dtype.str} if sink is not None else None,
+        }
+        if saved:
+            sketch, completed, saved_info, data_count = saved
+            if saved_info != run_info:
+                raise ValueError(f"Checkpoint {checkpoint} belongs to a different training run; "
+                                 f"delete it or pass the same parameters ({saved_info})")
+            # The sink itself checked that its file holds data_count values of its dtype
+            if progress is not None:
+                progress.skip(sum(task_counts[index] for index in completed))
+
+    task_seeds = spawn_seeds(seed, len(task_counts))
+    tasks = [
+        (index, count, size_range, value_range, engine, task_seed, engine_options, sink is not None)
+        for index, (count, task_seed) in enumerate(zip(task_counts, task_seeds))
+        if index not in completed
+    ]
+
+    last_checkpoint = time.monotonic()
+    try:
+        for index, task_sketch, values, seconds in backend.run(tasks, abort_event, progress):
+            if checkpoint is not None:
+                if task_sketch.count < task_counts[index]:
+                    continue  # Cut short by an abort; re-run in full on resume
+                completed.add(index)
+            sketch.merge(task_sketch)
+            if values is not None:
+                sink.write(values)
+            if on_task is not None:
+                on_task(index, task_sketch.count, seconds)
+            if checkpoint is not None and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                if sink is not None:
+                    sink.flush()
+                save_checkpoint(checkpoint, sketch, completed, run_info, sink.count if sink is not None else 0)
+                last_checkpoint = time.monotonic()
+    finally:
+        if checkpoint is not None:
+            if len(completed) < len(task_counts):
+                if sink is not None:
+                    sink.flush()
+                save_checkpoint(checkpoint, sketch, completed, run_info, sink.count if sink is not None else 0)
+            elif os.path.exists(checkpoint):
+                os.remove(checkpoint)
+
+    if progress is not None:
+        progress.close()
+    return sketch
+
+
+def sketch_path(thresholds_path):
+    """
+    Where the sketch behind a thresholds file is kept, e.g. risk_thresholds.sketch.npz.
+    """
+    return os.path.splitext(thresholds_path)[0] + ".sketch.npz"
+
+
+def write_thresholds(thresholds, path=THRESHOLDS_FILE, sketch=None):
+    """
+    Write the risk thresholds as plain floats to `path`; returns what was written.
+    The `sketch` they came from is kept next to them, so a later run can refine
+    them; without one, a sketch left by an earlier run is removed, since it no
+    longer matches the thresholds.
+    """
+    thresholds = {key: float(value) for key, value in thresholds.items()}
+    with open(path, "w") as f:
+        json.dump(thresholds, f, indent=4)
+    if sketch is not None:
+        sketch.save(sketch_path(path))
+    elif os.path.exists(sketch_path(path)):
+        os.remove(sketch_path(path))
+    return thresholds
+
+
+def load_threshold_sketch(path=THRESHOLDS_FILE):
+    """
+    The sketch saved with the thresholds at `path`, to refine them with more iterations.
+    """
+    if not os.path.exists(sketch_path(path)):
+        raise FileNotFoundError(f"No sketch saved next to {path}; run a full training first")
+    return RiskQuantileSketch.load(sketch_path(path))
+
+
+def save_thresholds(thresholds, path=THRESHOLDS_FILE, sketch=None):
+    """
+    Save the risk thresholds to risk_thresholds.json, reporting progress on the console.
+    """
+    try:
+        print("Saving thresholds to JSON...")
+        write_thresholds(thresholds, path, sketch)
+        print("Thresholds saved successfully.")
+    except Exception as e:
+        print(f"Error saving thresholds: {e}")
+
+
+def calibration_key(backend, engine, num_workers, engine_options=None):
+    """
+    Cache key for a calibration: this machine, the backend, the engine (with its options) and the worker count.
+    """
+    machine = f"{platform.node()}/{platform.machine()}/{cpu_count()}cpu"
+    options = ",".join(f"{name}={value}" for name, value in sorted((engine_options or {}).items()))
+    return f"{machine}|{backend}|{engine}({options})|{num_workers}workers"
+
+
+def load_calibration(key, path=CALIBRATION_FILE):
+    """
+    Cached trades per second for `key`, or None.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f).get(key, {}).get("trades_per_second")
+    except (OSError, ValueError):
+        return None
+
+
+def save_calibration(key, trades_per_second, path=CALIBRATION_FILE):
+    try:
+        with open(path) as f:
+            calibrations = json.load(f)
+    except (OSError, ValueError):
+        calibrations = {}
+    calibrations[key] = {"trades_per_second": float(trades_per_second), "updated": time.strftime("%Y-%m-%d %H:%M:%S")}
+    try:
+        with open(path, "w") as f:
+            json.dump(calibrations, f, indent=4)
+    except OSError as e:
+        print(f"Error saving calibration: {e}")
+
+
+def calibrate_throughput(size_range, value_range, backend="process", engine="numpy", num_workers=None,
+                         engine_options=None, backend_options=None, recalibrate=False, path=CALIBRATION_FILE):
+    """
+    Aggregate trades per second of `num_workers` workers of `backend` running `engine` on this machine.
+
+    Measured once with a short run of CALIBRATION_TASKS tasks of
+    CALIBRATION_CHUNKS chunks per worker and cached in `path`; completed
+    training runs overwrite the cache with their observed throughput. Each
+    worker's first report is left out of its rate: it includes building the
+    engine and sample pool and any JIT compilation.
+    """
+    num_workers = get_backend(backend, num_workers=num_workers, **(backend_options or {})).num_workers
+    key = calibration_key(backend, engine, num_workers, engine_options)
+    trades_per_second = None if recalibrate else load_calibration(key, path)
+    if trades_per_second is None:
+        task_size = CALIBRATION_CHUNKS * BATCH_CHUNK_SIZE
+        progress = TrainingProgress(num_workers * CALIBRATION_TASKS * task_size, warmup_updates=1)
+        generate_training_data(progress.total, size_range, value_range, backend, num_workers, engine=engine,
+                               engine_options=engine_options, abort_event=Event(), task_size=task_size,
+                               progress=progress, backend_options=backend_options)
+        snapshot = progress.snapshot()
+        # Sum of the workers' own warm rates; the wall-clock rate if no worker got past its warm-up
+        trades_per_second = sum(snapshot["worker_trades_per_second"].values()) or snapshot["trades_per_second"]
+        save_calibration(key, trades_per_second, path)
+    return trades_per_second
+
+
+def estimate_time(iterations, trades_per_second):
+    """
+    Human-readable training time for `iterations` trades at the calibrated throughput.
+    """
+    estimated_time = iterations / trades_per_second
+    minutes, seconds = divmod(estimated_time, 60)
+    return f"{int(minutes)} minutes and {int(seconds)} seconds"
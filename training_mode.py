@@ -1,201 +1,141 @@
-import random
-import pandas as pd
+import argparse
+import numpy as np
 
-from multiprocessing import cpu_count, Pool, Manager
 import time
-from tkinter import messagebox, Tk, Button
-import json
+from tkinter import messagebox, Tk, Button, Label, ttk
 import threading
 import os
-import psutil
-import subprocess
-from tqdm import tqdm
-from risk_calculations import (
-    monte_carlo_risk_simulation,
-    value_at_risk,
-    conditional_value_at_risk,
-    risk_parity,
-    calculate_final_risk
+from training_cli import add_training_arguments, check_training_arguments, run_training, training_options
+from training_core import (
+    abort_event,
+    calibrate_throughput,
+    estimate_time,
+    get_backend,
+    save_thresholds,
 )
+from training_storage import recompute_thresholds
+from training_progress import TrainingProgress, format_progress, print_progress
 
-# Flag to indicate if the process should be aborted
-abort_training = False
-
-
-def generate_single_batch(num_iterations, size_range, value_range, output_file):
-    """
-    Generates a batch of training data, calculates risks, and saves intermediate results to disk.
-    """
-    results = []
-    for _ in tqdm(range(num_iterations), desc="Generating batches", ncols=100):
-        if abort_training:
-            break  # Exit if abort flag is set
-        trade_size = random.randint(*size_range)
-        trade_value = random.randint(*value_range)
-
-        monte_carlo = monte_carlo_risk_simulation(trade_size, trade_value)
-        var = value_at_risk(trade_value)
-        cvar = conditional_value_at_risk(trade_value)
-        risk_parity_value = risk_parity(trade_value)
-        final_risk = calculate_final_risk(monte_carlo, var, cvar, risk_parity_value)
-
-        results.append({"Final Risk": final_risk})
-
-    # Save intermediate results to disk
-    pd.DataFrame(results).to_csv(output_file, index=False)
-
-
-def parallel_generate_training_data(total_iterations, size_range, value_range, num_processes=None):
-    """
-    Generates training data in parallel using multiprocessing with intermediate file storage.
-    """
-    if num_processes is None:
-        num_processes = cpu_count()  # Use all available CPU cores
-
-    iterations_per_process = (total_iterations // num_processes) // 2  # Smaller batches
-    temp_files = [f"temp_{i}.csv" for i in range(num_processes)]
-
-    with Pool(num_processes) as pool:
-        tasks = [
-            pool.apply_async(
-                generate_single_batch,
-                args=(iterations_per_process, size_range, value_range, temp_file)
-            )
-            for temp_file in temp_files
-        ]
-        for task in tasks:
-            task.wait()  # Wait for all tasks to finish
-
-    # Combine intermediate results from all files
-    combined_data = pd.concat([pd.read_csv(temp_file) for temp_file in temp_files], ignore_index=True)
-
-    # Clean up temporary files
-    for temp_file in temp_files:
-        os.remove(temp_file)
-
-    return combined_data
-
-
-def calculate_thresholds(results_df):
-    """
-    Calculates thresholds for risk levels based on the training data.
-    """
-    thresholds = {
-        "Low": results_df["Final Risk"].quantile(0.3),
-        "Medium": results_df["Final Risk"].quantile(0.7),
-        "High": results_df["Final Risk"].max()
-    }
-    return thresholds
-
-
-def save_results(training_data, thresholds):
-    """
-    Save the generated training data and risk thresholds to files.
-    """
-    try:
-        print("Saving training data to CSV...")
-        training_data.to_csv("training_data.csv", index=False)
-        print("Training data saved successfully.")
-    except Exception as e:
-        print(f"Error saving training data to CSV: {e}")
-
-    try:
-        print("Saving thresholds to JSON...")
-        thresholds = {key: float(value) for key, value in thresholds.items()}
-        with open("risk_thresholds.json", "w") as f:
-            json.dump(thresholds, f, indent=4)
-        print("Thresholds saved successfully.")
-    except Exception as e:
-        print(f"Error saving thresholds: {e}")
+# "Final Risk" values of the last training run; the extension picks the format
+TRAINING_DATA_FILE = "training_data.npy"
 
 
 def abort_training_process():
     """
-    Set the flag to abort the training process.
+    Signal the training workers to stop.
     """
-    global abort_training
-    abort_training = True
+    abort_event.set()
     messagebox.showinfo("Training Aborted", "The training process has been aborted.")
 
 
-def estimate_time(iterations):
+def report_event(event, **fields):
     """
-    Estimate the time for the training process based on known benchmarks.
+    Console messages for run_training's events.
     """
-    benchmark_iterations = 24331296
-    benchmark_time = 50 * 60  # in seconds (50 minutes)
-    estimated_time = (iterations / benchmark_iterations) * benchmark_time
-    minutes, seconds = divmod(estimated_time, 60)
-    return f"{int(minutes)} minutes and {int(seconds)} seconds"
-
-
-def terminate_and_restart_ra_py():
-    try:
-        ra_running = False  # Flag to track if RA.py was found
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            cmdline = proc.info.get('cmdline', [])
-            if cmdline and any('RA.py' in arg for arg in cmdline):
-                ra_running = True
-                proc.terminate()
-                print(f"RA.py (PID: {proc.info['pid']}) terminated successfully.")
-                break
-
-        if not ra_running:
-            print("RA.py not found running.")
-
-        # Restart RA.py process
-        subprocess.Popen(["python", "RA.py"])
-        print("RA.py restarted successfully.")
-    except psutil.NoSuchProcess as e:
-        print(f"Process already terminated: {e}")
-    except psutil.AccessDenied as e:
-        print(f"Permission denied when attempting to terminate RA.py: {e}")
-    except Exception as e:
-        print(f"Error terminating or restarting RA.py: {e}")
-
-
-def main():
-    global abort_training
-    # Parameters
-    NUM_ITERATIONS = 24331296
-    SIZE_RANGE = (1, 1000)
-    VALUE_RANGE = (1, 50000)
-
-    # Estimate training time
-    estimated_time = estimate_time(NUM_ITERATIONS)
-
-    # Create a Tkinter window for user interaction
+    if event == "start":
+        if fields["resumed"]:
+            print("Resuming the checkpointed run")
+        print(f"Training seed: {fields['seed'] if fields['seed'] is not None else 'from checkpoint'}")
+        print(f"Generating training data ({fields['backend']} backend, {fields['workers']} workers)...")
+    elif event == "aborted":
+        print()  # End the interrupted progress line
+        if fields["checkpoint"] is not None:
+            print(f"Run checkpointed to {fields['checkpoint']}; start Training Mode again to resume it.")
+    elif event == "done":
+        if fields["training_data"] is not None:
+            print(f"Training data saved to {fields['training_data']}.")
+        print(f"Thresholds from {fields['sketch_count']} trades saved to {fields['output']}.")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Risk Assessment PRO training mode")
+    add_training_arguments(parser, training_data=TRAINING_DATA_FILE)
+    parser.add_argument("--recalibrate", action="store_true",
+                        help="Re-measure throughput for the time estimate instead of using the cached value")
+    parser.add_argument("--recompute-thresholds", action="store_true",
+                        help="Recompute exact thresholds from the saved training data and exit")
+    args = parser.parse_args(argv)
+    check_training_arguments(parser, args)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = training_options(args)
+    if args.recompute_thresholds:
+        save_thresholds(recompute_thresholds(args.training_data, options["dtype"]), args.output)
+        return
+
+    backend = get_backend(args.backend, num_workers=args.workers, **(options["backend_options"] or {}))
+    options["backend"] = backend
+
+    # Progress is printed to the console and shown in a small Tkinter window;
+    # its ETA starts from the calibration and converges to the observed rate
+    progress = TrainingProgress(args.iterations, on_update=print_progress)
+    estimate = {"text": "Calibrating training throughput..."}  # Written by the training thread, shown by the UI
     root = Tk()
-    root.withdraw()  # Hide the root window
+    root.title("Risk Assessment Training")
+
+    # RA.py launches this without arguments, so offer to resume instead of discarding the checkpoint
+    checkpoint = options["checkpoint"]
+    if checkpoint is not None and not args.resume and os.path.exists(checkpoint):
+        options["resume"] = messagebox.askyesno(
+            "Resume Training",
+            "An unfinished training run was found. Resume it?\n\n"
+            "Choosing No discards it and starts a new run."
+        )
+    progress_bar = ttk.Progressbar(root, mode="determinate", maximum=1.0, length=500)
+    progress_bar.pack(padx=10, pady=(10, 5))
+    status_label = Label(root, text="Starting workers...", font=("Consolas", 9))
+    status_label.pack(padx=10)
+    estimate_label = Label(root, text=estimate["text"])
+    estimate_label.pack(padx=10)
 
     # Create an "Abort" button
     abort_button = Button(root, text="Abort Training", command=abort_training_process)
-    abort_button.pack()
+    abort_button.pack(pady=(5, 10))
+
+    def refresh_progress():
+        snapshot = progress.snapshot()
+        progress_bar["value"] = snapshot["fraction"]
+        status_label.config(text=format_progress(snapshot))
+        estimate_label.config(text=estimate["text"])
+        root.after(500, refresh_progress)
 
-    # Warn the user about training duration
-    messagebox.showinfo(
-        "Training Mode",
-        f"Training will take approximately {estimated_time}. This is very CPU intensive. Please wait..."
-    )
+    refresh_progress()
 
-    # Start training in a separate thread to allow UI responsiveness
+    # Start training in a separate thread to allow UI responsiveness; the time
+    # estimate is shown in the window instead of a dialog, so nothing waits on the user
     def training_thread():
-        global abort_training  # Use global instead of nonlocal
         start_time = time.time()
-        print("Generating training data in parallel...")
-
-        # Generate data in parallel
-        training_data = parallel_generate_training_data(NUM_ITERATIONS, SIZE_RANGE, VALUE_RANGE)
-
-        if abort_training:
-            return  # Stop if the process is aborted
-
-        # Calculate thresholds
-        print("Analyzing training data...")
-        thresholds = calculate_thresholds(training_data)
 
-        # Save results
-        save_results(training_data, thresholds)
+        task_seconds = []
+        try:
+            # Estimate training time from this machine's measured throughput (cached after the first run)
+            print("Calibrating training throughput...")
+            trades_per_second = calibrate_throughput(options["size_range"], options["value_range"], args.backend,
+                                                     args.engine, backend.num_workers, options["engine_options"],
+                                                     options["backend_options"], recalibrate=args.recalibrate)
+            estimate["text"] = (f"Training will take approximately "
+                                f"{estimate_time(args.iterations, trades_per_second)}. "
+                                f"This is very CPU intensive. Please wait...")
+            if abort_event.is_set():
+                return  # Aborted while calibrating; run_training would clear the event
+            progress.expected_rate = trades_per_second
+            progress.start_time = time.monotonic()  # Calibration time is not training time
+
+            # The run streams to the sketch and the training data file, and is
+            # checkpointed so an abort or crash can be resumed with --resume
+            thresholds = run_training(progress=progress, on_event=report_event,
+                                      on_task=lambda index, count, seconds: task_seconds.append(seconds), **options)
+        except Exception as e:
+            messagebox.showerror("Training Failed", f"Training failed: {e}")
+            return
+        if task_seconds:
+            print(f"{len(task_seconds)} tasks: {np.mean(task_seconds):.2f}s mean, "
+                  f"{np.min(task_seconds):.2f}s fastest, {np.max(task_seconds):.2f}s slowest")
+        if thresholds is None:
+            return  # Aborted; keep the previous thresholds
 
         elapsed_time = time.time() - start_time
         messagebox.showinfo(
@@ -205,11 +145,9 @@ def main():
             f"Low Risk: Below {thresholds['Low']:.2f}\n"
             f"Medium Risk: {thresholds['Low']:.2f} - {thresholds['Medium']:.2f}\n"
             f"High Risk: Above {thresholds['Medium']:.2f}\n\n"
-            f"Training complete, rebooting RA Software... Please close older instances if needed."
+            f"A running RA Software picks up the new thresholds automatically."
         )
 
-        # Terminate and restart RA.py, then shut down the console
-        terminate_and_restart_ra_py()
         print("Shutting down the console...")
         os._exit(0)  # Terminate Python program immediately
 
@@ -221,4 +159,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()                  
\ No newline at end of file
+    main()
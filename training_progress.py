@@ -0,0 +1,126 @@
+import sys
+import threading
+import time
+
+# Seconds of observation the expected rate is worth when blending it with the measured one
+PRIOR_SECONDS = 30.0
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class TrainingProgress:
+    """
+    Aggregated progress of a training run, fed by the parent from the workers' chunk reports.
+
+    update() and snapshot() are thread-safe, so the training thread can feed
+    it while the console or a Tk window reads it. `on_update(snapshot)` is
+    called at most every `interval` seconds, and from close() if the last
+    call missed any trades.
+
+    `expected_rate` (trades per second, e.g. from a calibration run) seeds the
+    ETA; it counts as PRIOR_SECONDS of observation, so the measured rate
+    takes over as the run goes on.
+
+    The first `warmup_updates` reports of each worker count towards the
+    progress but not towards that worker's rate, so start-up costs (engine
+    construction, JIT compilation) do not skew a short measurement.
+    """
+
+    def __init__(self, total, on_update=None, interval=0.5, expected_rate=None, warmup_updates=0):
+        self.total = total
+        self.expected_rate = expected_rate
+        self.on_update = on_update
+        self.interval = interval
+        self.warmup_updates = warmup_updates
+        self.completed = 0
+        self.skipped = 0  # Trades done before this run started (e.g. restored from a checkpoint)
+        self.start_time = time.monotonic()
+        self._workers = {}  # worker id -> [trades, busy seconds, reports]
+        self._last_update = 0.0
+        self._last_reported = None
+        self._lock = threading.Lock()
+
+    def update(self, worker, count, seconds):
+        """
+        Record that `worker` finished `count` trades in `seconds` of compute time.
+        """
+        with self._lock:
+            self.completed += count
+            totals = self._workers.setdefault(worker, [0, 0.0, 0])
+            if totals[2] >= self.warmup_updates:
+                totals[0] += count
+                totals[1] += seconds
+            totals[2] += 1
+        now = time.monotonic()
+        if self.on_update is not None and now - self._last_update >= self.interval:
+            self._last_update = now
+            self._report()
+
+    def _report(self):
+        snapshot = self.snapshot()
+        self._last_reported = snapshot["completed"]
+        self.on_update(snapshot)
+
+    def skip(self, count):
+        """
+        Count `count` trades as already done without crediting them to this run's throughput.
+        """
+        with self._lock:
+            self.completed += count
+            self.skipped += count
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.monotonic() - self.start_time
+            done_here = self.completed - self.skipped
+            rate = done_here / elapsed if elapsed > 0 else 0.0
+            eta_rate = rate
+            if self.expected_rate:
+                eta_rate = (done_here + self.expected_rate * PRIOR_SECONDS) / (elapsed + PRIOR_SECONDS)
+            remaining = max(self.total - self.completed, 0)
+            return {
+                "completed": self.completed,
+                "total": self.total,
+                "fraction": self.completed / self.total if self.total else 1.0,
+                "elapsed_seconds": elapsed,
+                "trades_per_second": rate,
+                "eta_seconds": remaining / eta_rate if eta_rate > 0 else None,
+                "worker_trades_per_second": {
+                    worker: trades / busy if busy > 0 else 0.0
+                    for worker, (trades, busy, _) in self._workers.items()
+                },
+            }
+
+    def close(self):
+        if self.on_update is not None and self._last_reported != self.completed:
+            self._report()
+
+
+def format_progress(snapshot):
+    """
+    One-line summary of a TrainingProgress snapshot.
+    """
+    eta = snapshot["eta_seconds"]
+    worker_rates = snapshot["worker_trades_per_second"].values()
+    slowest = min(worker_rates, default=0.0)
+    fastest = max(worker_rates, default=0.0)
+    return (
+        f"{snapshot['fraction']:6.1%} {snapshot['completed']:,}/{snapshot['total']:,} trades | "
+        f"{snapshot['trades_per_second']:,.0f} trades/s | "
+        f"ETA {format_duration(eta) if eta is not None else '--:--'} | "
+        f"{len(worker_rates)} workers {slowest:,.0f}-{fastest:,.0f} trades/s each"
+    )
+
+
+def print_progress(snapshot, stream=None):
+    """
+    Console on_update callback: rewrite a single status line in place.
+    """
+    stream = stream or sys.stdout
+    end = "\n" if snapshot["completed"] >= snapshot["total"] else ""
+    stream.write("\r" + format_progress(snapshot) + end)
+    stream.flush()
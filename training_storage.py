@@ -0,0 +1,193 @@
+import os
+
+import numpy as np
+
+# pyarrow is optional: without it only the raw and .npy formats are available
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from threshold_stats import thresholds_from_values
+
+TRAINING_DATA_COLUMN = "Final Risk"
+TRAINING_DATA_FORMATS = (".npy", ".parquet", ".bin")
+
+_NPY_HEADER_SIZE = 128  # Fixed, so the shape can be patched in place on close
+
+
+class BinarySink:
+    """
+    Append-only file of raw values; read back with np.fromfile or np.memmap.
+
+    With `resume_count` an existing file is reopened, cut back to its first
+    resume_count values (e.g. the count recorded by a training checkpoint)
+    and appended to. The file must already hold that many values of `dtype`;
+    a ValueError is raised otherwise, before anything is truncated.
+    """
+
+    header_size = 0
+
+    def __init__(self, path, dtype=np.float64, resume_count=None):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        if resume_count is None:
+            self.count = 0
+            self._file = open(path, "wb")
+            self._write_header()
+        else:
+            self._check_resume(resume_count)
+            self.count = resume_count
+            self._file = open(path, "r+b")
+            self._file.truncate(self.header_size + resume_count * self.dtype.itemsize)
+            self._file.seek(0, os.SEEK_END)
+
+    def _write_header(self):
+        pass
+
+    def _check_resume(self, resume_count):
+        available = (os.path.getsize(self.path) - self.header_size) // self.dtype.itemsize
+        if available < resume_count:
+            raise ValueError(f"{self.path} holds {max(available, 0)} {self.dtype} values, "
+                             f"fewer than the {resume_count} to resume from")
+
+    def write(self, values):
+        np.asarray(values, dtype=self.dtype).tofile(self._file)
+        self.count += len(values)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _npy_header(dtype, count):
+    """
+    Version 1.0 .npy header for a 1-D array, padded to _NPY_HEADER_SIZE bytes.
+    """
+    header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (count,)})
+    prefix = np.lib.format.MAGIC_PREFIX + bytes([1, 0])
+    padding = _NPY_HEADER_SIZE - len(prefix) - 2 - len(header) - 1
+    header = (header + " " * padding + "\n").encode("latin1")
+    return prefix + len(header).to_bytes(2, "little") + header
+
+
+class NpySink(BinarySink):
+    """
+    Append-only 1-D .npy file; the header's shape is written on close, so np.load can memory-map it.
+    """
+
+    header_size = _NPY_HEADER_SIZE
+
+    def _write_header(self):
+        self._file.write(_npy_header(self.dtype, 0))
+
+    def _check_resume(self, resume_count):
+        with open(self.path, "rb") as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                _, _, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                _, _, dtype = np.lib.format.read_array_header_2_0(f)
+            header_size = f.tell()
+        if header_size != self.header_size:
+            raise ValueError(f"{self.path} was not written by a training sink and cannot be resumed")
+        if dtype != self.dtype:
+            raise ValueError(f"{self.path} holds {dtype} values, not {self.dtype}")
+        super()._check_resume(resume_count)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.seek(0)
+            self._file.write(_npy_header(self.dtype, self.count))
+        super().close()
+
+
+class ParquetSink:
+    """
+    Single-column Parquet file, one row group per write (requires pyarrow).
+    """
+
+    def __init__(self, path, dtype=np.float64, resume_count=None):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Writing Parquet training data requires pyarrow")
+        if resume_count is not None:
+            raise ValueError("Parquet training data cannot be resumed; use .npy or .bin")
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        schema = pa.schema([(TRAINING_DATA_COLUMN, pa.from_numpy_dtype(self.dtype))])
+        self._writer = pq.ParquetWriter(path, schema)
+
+    def write(self, values):
+        column = pa.array(np.asarray(values, dtype=self.dtype))
+        self._writer.write_table(pa.table({TRAINING_DATA_COLUMN: column}))
+        self.count += len(values)
+
+    def flush(self):
+        pass  # Every write is already a complete row group
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_training_sink(path, dtype=np.float64, resume_count=None):
+    """
+    Sink for `path`, picking the format from its extension (.npy, .parquet or raw .bin).
+    `resume_count` appends to an existing file after its first resume_count values.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return NpySink(path, dtype, resume_count)
+    if extension == ".parquet":
+        return ParquetSink(path, dtype, resume_count)
+    if extension == ".bin":
+        return BinarySink(path, dtype, resume_count)
+    raise ValueError(f"Unsupported training data format {extension!r}; expected one of {TRAINING_DATA_FORMATS}")
+
+
+def load_training_data(path, dtype=np.float64):
+    """
+    Read-only final risks from a training data file, memory-mapped wherever the format allows.
+
+    `dtype` only matters for raw .bin files, which carry no header. Legacy
+    training_data.csv files are still parsed, just slowly.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r")
+    if extension == ".bin":
+        return np.memmap(path, dtype=dtype, mode="r")
+    if extension == ".parquet":
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Reading Parquet training data requires pyarrow")
+        table = pq.read_table(path, columns=[TRAINING_DATA_COLUMN], memory_map=True)
+        return table.column(TRAINING_DATA_COLUMN).to_numpy()
+    if extension == ".csv":
+        return np.loadtxt(path, delimiter=",", skiprows=1, ndmin=1)
+    raise ValueError(f"Unsupported training data format {extension!r}; expected one of {TRAINING_DATA_FORMATS}")
+
+
+def recompute_thresholds(path, dtype=np.float64):
+    """
+    Exact risk thresholds of a saved training run, without regenerating it.
+    """
+    values = np.array(load_training_data(path, dtype), dtype=np.float64)  # Writable copy to partition
+    if len(values) == 0:
+        raise ValueError(f"No training data in {path}")
+    return thresholds_from_values(values)